@@ -0,0 +1,166 @@
+# benchmark_markdown.py
+# Compares the shared MarkdownCleaner engine with the previous per-construct regex pipelines:
+# times both on large markup-heavy and prose documents and checks the outputs are identical,
+# including on generated model-style documents. Also streams a file through MarkdownToText.stream_clean_text
+# and compares its peak memory and output with extract_clean_text.
+# Run: python examples/benchmark_markdown.py [sections]
+import re
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from WrapAI.utils.markdown import MarkdownToText, MarkdownToTextFromString
+
+
+# Previous implementations, kept here as the reference
+def legacy_file_strip(md_text):
+    text = re.sub(r'```.*?```', '', md_text, flags=re.DOTALL)
+    text = re.sub(r'`.*?`', '', text)
+    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', text)
+    text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
+    text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
+    text = re.sub(r'^\s*#{1,6}\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*>+\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[-+*]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\s{2,}', ' ', text)
+    return text.strip()
+
+
+def legacy_string_strip(md_text):
+    text = re.sub(r'```.*?```', '', md_text, flags=re.DOTALL)
+    text = re.sub(r'`.*?`', '', text)
+    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', text)
+    text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
+    text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
+    text = re.sub(r'^\s*#{1,6}\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*>+\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[-+*]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'[ \t]{2,}', ' ', text)
+    text = re.sub(r' {2,}', ' ', text)
+    return text.strip()
+
+
+SECTION = """# Analysis of {n}
+
+## Summary
+
+The **key finding** is that *most* documents mention [the report](https://example.com/r/{n}) and
+`inline_code()` snippets. Some use __strong__ and _emphasis_ markers.
+
+> A quoted line from the source.
+>> A nested quote.
+
+- First bullet with **bold** text
+- Second bullet linking [docs](https://docs.example.com)
+  * Indented bullet
+1. Numbered item
+2. Another numbered item
+
+![diagram](https://example.com/img/{n}.png)
+
+```python
+def example_{n}():
+    return "**not emphasis**"
+```
+
+---
+
+Closing paragraph    with   extra   spaces.	Tabs	too.
+
+"""
+
+
+PROSE = """The model output for item {n} is mostly plain prose. It explains the result in a few sentences,
+lists no code and uses no links, which is typical of summarisation prompts.
+
+"""
+
+
+def build_document(sections: int, template: str = SECTION) -> str:
+    return "".join(template.format(n=i) for i in range(sections))
+
+
+WORDS = ["model", "output", "snake_case_name", "value", "the", "result", "token", "prompt", "and", "with"]
+INLINE = ["**{w}**", "*{w}*", "_{w}_", "__{w}__", "`{w}`", "[{w}](https://example.com/{w}_page)",
+          "![{w}](https://example.com/{w}.png)", "**{w} *{w}* {w}**", "***{w}***", "[**{w}**](https://x.y/{w})",
+          "**[{w}](https://x.y)**", "{w}_{w}"]
+LINE_PREFIXES = ["", "", "", "# ", "### ", "- ", "* ", "1. ", "> ", ">> ", "  - "]
+
+
+def fuzz_document(rng: random.Random, lines: int = 12) -> str:
+    """Well-formed, model-style markdown assembled from random constructs."""
+    out = []
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.08:
+            out.append("```\n" + " ".join(rng.choices(WORDS, k=4)) + " **x**\n```")
+        elif roll < 0.14:
+            out.append(rng.choice(["---", "***", ""]))
+        else:
+            parts = [rng.choice(INLINE).format(w=rng.choice(WORDS)) if rng.random() < 0.35 else rng.choice(WORDS)
+                     for _ in range(rng.randint(3, 10))]
+            out.append(rng.choice(LINE_PREFIXES) + " ".join(parts))
+    return "\n".join(out) + "\n"
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def timed(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for name, template in (("markup-heavy", SECTION), ("prose", PROSE)):
+        document = build_document(sections, template)
+        print(f"{name} document: {len(document) / 1e6:.1f} MB")
+
+        for label, legacy, engine in (
+            ("MarkdownToText", legacy_file_strip, MarkdownToText._strip_markdown),
+            ("MarkdownToTextFromString", legacy_string_strip, MarkdownToTextFromString._strip_markdown),
+        ):
+            legacy_time, legacy_out = timed(legacy, document)
+            engine_time, engine_out = timed(engine, document)
+            print(f"  {label}: legacy {legacy_time:.3f}s, engine {engine_time:.3f}s "
+                  f"({legacy_time / engine_time:.1f}x), identical output: {legacy_out == engine_out}")
+
+    rng = random.Random(0)
+    samples = [fuzz_document(rng) for _ in range(2000)]
+    for label, legacy, engine in (
+        ("MarkdownToText", legacy_file_strip, MarkdownToText._strip_markdown),
+        ("MarkdownToTextFromString", legacy_string_strip, MarkdownToTextFromString._strip_markdown),
+    ):
+        differing = sum(legacy(s) != engine(s) for s in samples)
+        print(f"{label}: {differing} of {len(samples)} generated documents differ from the legacy output")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = Path(tmp) / "archive.md", Path(tmp) / "archive.txt"
+        source.write_text(build_document(sections), encoding="utf-8")
+        handler = MarkdownToText(source)
+        stream_time, stream_peak, _ = peak_memory(lambda: handler.stream_clean_text(target))
+        full_time, full_peak, full_text = peak_memory(handler.extract_clean_text)
+        print(f"Streaming {source.stat().st_size / 1e6:.1f} MB: peak {stream_peak / 1e6:.1f} MB in {stream_time:.2f}s "
+              f"vs {full_peak / 1e6:.1f} MB in {full_time:.2f}s in memory, "
+              f"identical output: {target.read_text(encoding='utf-8') == full_text}")
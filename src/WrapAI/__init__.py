@@ -17,13 +17,30 @@ from .prompt_attributes import PromptAttributes, VeniceParameters
 from .prompt_text import VeniceTextPrompt
 from .prompt_chat import VeniceChatPrompt
 from .prompt_library import PromptLibrary
+from .prompt_library_index import IndexedPromptLibrary
+from .prompt_pipeline import PromptPipeline, PipelineResult
 from .prompt_template import PromptTemplate
+from .prompt_budget import PromptBudget, BudgetReport
+from .prompt_batch import MicroBatcher, BatchStats
+from .prompt_tools import ToolRunner, ToolRunResult, ToolRound, ToolCallResult
+from .prompt_choices import select_by, select_longest, select_shortest, select_majority, select_valid, unique_choices
+from .prompt_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
+from .prompt_router import ModelRouter, ModelStats
+from .prompt_preflight import ContextPreflight, ContextOverflowError, PreflightResult
+from .prompt_compression import PromptCompressor, CompressionReport, LOW_VALUE_SECTIONS
 from .prompt_response import PromptResponse
 from .handlers import FILE_HANDLERS
 from .wv_core import WEB_SEARCH_MODES, CUSTOM_SYSTEM_PROMPT
 from .schema_document import DocumentManager
+from .schema_document_index import DocumentIndex
 from .schema_json import SchemaBuilder, SchemaField, extract_schema_fields_from_json, reconcile_schema_fields
 from .schema_parser import parse_response_with_schema
+from .schema_validator import CompiledSchema, compile_schema
+from .schema_bulk import validate_jsonl, BulkValidationResult
+from .schema_stream import StreamingSchemaValidator, SchemaViolation
+from .schema_records import Record, RecordDecoder, record_class
+from .schema_compact import CompactSchema, compact_schema
+from .schema_repair import StructuredOutputRepairer, RepairStats, repair_json
 from .info.models import VeniceModels
 
 
@@ -34,16 +51,59 @@ __all__ = [
     "VeniceTextPrompt",
     "VeniceChatPrompt",
     "PromptLibrary",
+    "IndexedPromptLibrary",
+    "PromptPipeline",
+    "PipelineResult",
     "PromptTemplate",
+    "PromptBudget",
+    "BudgetReport",
+    "MicroBatcher",
+    "BatchStats",
+    "ToolRunner",
+    "ToolRunResult",
+    "ToolRound",
+    "ToolCallResult",
+    "select_by",
+    "select_longest",
+    "select_shortest",
+    "select_majority",
+    "select_valid",
+    "unique_choices",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitOpenError",
+    "ModelRouter",
+    "ModelStats",
+    "ContextPreflight",
+    "ContextOverflowError",
+    "PreflightResult",
+    "PromptCompressor",
+    "CompressionReport",
+    "LOW_VALUE_SECTIONS",
     "PromptResponse",
     "FILE_HANDLERS",
     "WEB_SEARCH_MODES",
     "CUSTOM_SYSTEM_PROMPT",
     "DocumentManager",
+    "DocumentIndex",
     "SchemaBuilder",
     "SchemaField",
     "extract_schema_fields_from_json",
     "reconcile_schema_fields",
     "parse_response_with_schema",
+    "CompiledSchema",
+    "compile_schema",
+    "validate_jsonl",
+    "BulkValidationResult",
+    "StreamingSchemaValidator",
+    "SchemaViolation",
+    "Record",
+    "RecordDecoder",
+    "record_class",
+    "CompactSchema",
+    "compact_schema",
+    "StructuredOutputRepairer",
+    "RepairStats",
+    "repair_json",
     "VeniceModels"
 ]
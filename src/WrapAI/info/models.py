@@ -1,5 +1,6 @@
 # models.py
 
+import time
 import requests
 import logging
 import warnings
@@ -11,12 +12,26 @@ logger = logging.getLogger(__name__)
 
 
 class VeniceModels:
+    # Shared catalogs by (base_url, api_key): (fetched_at, instance)
+    _cache = {}
+
     def __init__(self, api_key, base_url=BASE_URL):
         self.api_key = api_key
         self.base_url = base_url
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         self.models_data = []  # To store models data after fetching
 
+    @classmethod
+    def cached(cls, api_key, base_url=BASE_URL, max_age=3600):
+        """Returns a shared catalog for the account, fetched at most once every max_age seconds."""
+        key = (base_url, api_key)
+        fetched_at, models = cls._cache.get(key, (0.0, None))
+        if models is None or not models.models_data or time.monotonic() - fetched_at > max_age:
+            models = models or cls(api_key, base_url)
+            models.fetch_models()
+            cls._cache[key] = (time.monotonic(), models)
+        return models
+
     # Fetch method
     def fetch_models(self):
         """Fetches the models from the API and stores them in the instance."""
@@ -0,0 +1,246 @@
+# prompt_batch.py
+"""
+Micro-batching of many small prompts that share a system prompt into one structured request.
+
+Includes:
+- `BatchStats`: Items, requests sent, items retried and items left without an answer.
+- `MicroBatcher`: Packs prompts (or template values) into requests sized from token counts and the model's
+  context, asks for a `SchemaBuilder` array with one object per item id, and splits the result back into one
+  `PromptResponse` per input.
+"""
+
+import re
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Union
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_response import PromptResponse
+from .prompt_template import PromptTemplate
+from .schema_json import SchemaBuilder
+from .schema_parser import parse_response_with_schema
+from .schema_repair import repair_json, JsonRepairError
+from .info.models import VeniceModels
+from .utils.tokens_char import count_characters_and_tokens
+
+ITEMS_KEY = "items"
+ID_KEY = "id"
+
+BATCH_INSTRUCTIONS = ("Answer each of the {count} items below independently, following the instructions above "
+                      "for each one. Reply with one entry per item in \"items\", with the item's id in \"id\".")
+ITEM_HEADER = "\n\n### Item {id}\n"
+
+# Tokens per item for the header and the id/JSON framing of its answer
+ITEM_OVERHEAD_TOKENS = 12
+
+
+@dataclass
+class BatchStats:
+    items: int = 0
+    requests: int = 0
+    retried: int = 0
+    missing: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class MicroBatcher:
+    def __init__(self, client, item_schema: Union[SchemaBuilder, Dict[str, Any]], system_prompt: str = "",
+                 completion_tokens_per_item: int = 64, max_items: int = 50, context_tokens: Optional[int] = None,
+                 max_completion_tokens: int = 4096, safety_margin: float = 0.1, retry_missing: bool = True,
+                 tokenizer_model: str = "gpt-3.5-turbo"):
+        """
+        :param client: `VeniceTextPrompt`/`OpenAITextPrompt` used to send the packed requests.
+        :param item_schema: Fields of one item's answer (a SchemaBuilder or its `build()` result).
+        :param system_prompt: Shared by every item; sent once per request.
+        :param completion_tokens_per_item: Expected answer size of one item.
+        :param max_items: Upper bound of items per request.
+        :param context_tokens: Model context; looked up in the cached model catalog when omitted.
+        :param max_completion_tokens: Upper bound of the reply of one request.
+        :param retry_missing: Re-send items the model left out or answered invalidly, once, in a new pack.
+        """
+        self.client = client
+        self.item_builder = self._as_builder(item_schema)
+        self.system_prompt = system_prompt
+        self.completion_tokens_per_item = completion_tokens_per_item
+        self.max_items = max_items
+        self.context_tokens = context_tokens
+        self.max_completion_tokens = max_completion_tokens
+        self.safety_margin = safety_margin
+        self.retry_missing = retry_missing
+        self.tokenizer_model = tokenizer_model
+        self.stats = BatchStats()
+
+        self.item_schema = SchemaBuilder(self.item_builder.schema_name).add_string_property(ID_KEY)
+        for name, prop in self.item_builder.properties.items():
+            self.item_schema.properties[name] = prop
+        self.item_schema.required.extend(self.item_builder.required)
+        self.batch_schema = (SchemaBuilder(f"{self.item_builder.schema_name}_batch")
+                             .add_object_array_property(ITEMS_KEY, self.item_schema).build())
+        self._item_schema_json = self.item_schema.build()
+
+    # Run methods
+    def run(self, prompts: List[str], system_prompt: Optional[str] = None) -> List[Optional[PromptResponse]]:
+        """
+        Answer every prompt; results are in input order, None where no valid answer came back.
+
+        :param system_prompt: Used for this run instead of the batcher's `system_prompt`.
+        """
+        system_prompt = self.system_prompt if system_prompt is None else system_prompt
+        self.stats.items += len(prompts)
+        results: List[Optional[PromptResponse]] = [None] * len(prompts)
+        pending = list(range(len(prompts)))
+
+        for attempt in range(2 if self.retry_missing else 1):
+            if attempt:
+                self.stats.retried += len(pending)
+                logger.info(f"🔄 Retrying {len(pending)} batch items without a valid answer")
+            for pack in self.pack([prompts[i] for i in pending], system_prompt):
+                indices = [pending[i] for i in pack]
+                for index, response in zip(indices, self._send([prompts[i] for i in indices], system_prompt)):
+                    results[index] = response
+            pending = [i for i in pending if results[i] is None]
+            if not pending:
+                break
+
+        self.stats.missing += len(pending)
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} of {len(prompts)} batch items got no valid answer")
+        return results
+
+    def run_template(self, template: PromptTemplate, values: List[Dict[str, Any]], library=None,
+                     system_prompt: Optional[str] = None) -> List[Optional[PromptResponse]]:
+        """
+        Render `template` once per values dict and answer them in batches with the template's system prompt.
+
+        :param library: `PromptLibrary` that resolves the template's `custom_system_prompt_name`.
+        :param system_prompt: Overrides the template's system prompt; the batcher's `system_prompt` is used
+            when neither is set.
+        """
+        if system_prompt is None and (template.prompt_system_use or template.custom_system_prompt_name):
+            if library is not None:
+                system_prompt = library.resolve_system_prompt(template)
+            elif template.custom_system_prompt_name:
+                logger.warning(f"⚠️ No library to resolve system prompt '{template.custom_system_prompt_name}'; "
+                               f"using the template's own")
+                system_prompt = template.prompt_system_text if template.prompt_system_use else None
+            else:
+                system_prompt = template.prompt_system_text
+        return self.run([template.get_formatted_prompt(item_values) for item_values in values], system_prompt)
+
+    def pack(self, prompts: List[str], system_prompt: Optional[str] = None) -> List[List[int]]:
+        """Split prompt indices into packs that fit the model's context and the reply limit."""
+        system_prompt = self.system_prompt if system_prompt is None else system_prompt
+        usable = int(self._context_tokens() * (1 - self.safety_margin))
+        fixed = self._count(system_prompt) + self._count(BATCH_INSTRUCTIONS) + self._count(
+            json.dumps(self.batch_schema))
+        per_item_reply = self.completion_tokens_per_item + ITEM_OVERHEAD_TOKENS
+        max_items = max(1, min(self.max_items, self.max_completion_tokens // per_item_reply))
+
+        packs, current, used = [], [], fixed
+        for i, prompt in enumerate(prompts):
+            cost = self._count(prompt) + ITEM_OVERHEAD_TOKENS + per_item_reply
+            if current and (len(current) >= max_items or used + cost > usable):
+                packs.append(current)
+                current, used = [], fixed
+            if fixed + cost > usable:
+                logger.warning(f"⚠️ Batch item {i} alone exceeds the context ({fixed + cost} > {usable} tokens)")
+            current.append(i)
+            used += cost
+        if current:
+            packs.append(current)
+        logger.debug(f"Packed {len(prompts)} prompts into {len(packs)} requests")
+        return packs
+
+    # Helper methods
+    def _send(self, prompts: List[str], system_prompt: str) -> List[Optional[PromptResponse]]:
+        user_prompt = BATCH_INSTRUCTIONS.format(count=len(prompts)) + "".join(
+            ITEM_HEADER.format(id=i + 1) + prompt for i, prompt in enumerate(prompts))
+
+        attributes = self.client.attributes
+        saved = attributes.max_completion_tokens, attributes.response_format
+        reply_tokens = len(prompts) * (self.completion_tokens_per_item + ITEM_OVERHEAD_TOKENS)
+        attributes.max_completion_tokens = min(self.max_completion_tokens, max(reply_tokens, saved[0] or 0))
+        attributes.response_format = self.batch_schema
+        try:
+            self.stats.requests += 1
+            batch = self.client.prompt(user_prompt, system_prompt or "You are a helpful assistant.")
+        finally:
+            attributes.max_completion_tokens, attributes.response_format = saved
+        if batch is None:
+            return [None] * len(prompts)
+
+        try:
+            value, _ = repair_json(batch.response)
+        except JsonRepairError as e:
+            logger.error(f"⚠️ Batch reply is not JSON: {e}")
+            return [None] * len(prompts)
+        entries = value.get(ITEMS_KEY, []) if isinstance(value, dict) else value if isinstance(value, list) else []
+
+        answers: Dict[str, dict] = {}
+        for entry in entries:
+            # Models sometimes echo the id as a number or as "Item 3"
+            item_id = re.search(r"\d+", str(entry.get(ID_KEY, ""))) if isinstance(entry, dict) else None
+            if item_id is None:
+                continue
+            try:
+                parsed = parse_response_with_schema({**entry, ID_KEY: item_id.group()}, self._item_schema_json)
+            except (ValueError, TypeError) as e:
+                logger.debug(f"Invalid batch entry {entry!r}: {e}")
+                continue
+            answers.setdefault(parsed.pop(ID_KEY), parsed)
+
+        usage = self._per_item_usage(batch.usage or {}, len(prompts))
+        return [
+            self._item_response(batch, prompts[i], answers[str(i + 1)], usage) if str(i + 1) in answers else None
+            for i in range(len(prompts))
+        ]
+
+    def _item_response(self, batch: PromptResponse, prompt: str, answer: dict,
+                       usage: Dict[str, Any]) -> PromptResponse:
+        return PromptResponse(
+            model=batch.model,
+            created=batch.created,
+            usage=dict(usage),
+            think=batch.think,
+            response=json.dumps(answer, ensure_ascii=False),
+            citations=list(batch.citations or []),
+            parameters=batch.parameters,
+            system_prompt=batch.system_prompt,
+            user_prompt=prompt
+        )
+
+    @staticmethod
+    def _per_item_usage(usage: Dict[str, Any], count: int) -> Dict[str, Any]:
+        """The request's usage split evenly across its items, with the batch size."""
+        shared = {key: round(value / count) for key, value in usage.items()
+                  if isinstance(value, (int, float)) and not isinstance(value, bool)}
+        shared["batch_size"] = count
+        return shared
+
+    def _context_tokens(self) -> int:
+        if self.context_tokens is None:
+            tokens = VeniceModels.cached(self.client.api_key, self.client.base_url).get_tokens_by_model_name(
+                self.client.model)
+            if isinstance(tokens, int):
+                self.context_tokens = tokens
+            else:
+                logger.warning(f"Unknown max tokens for model '{self.client.model}', defaulting to 8000.")
+                self.context_tokens = 8000
+        return self.context_tokens
+
+    def _count(self, text: str) -> int:
+        return count_characters_and_tokens(text, self.tokenizer_model)[1]
+
+    @staticmethod
+    def _as_builder(schema: Union[SchemaBuilder, Dict[str, Any]]) -> SchemaBuilder:
+        if isinstance(schema, SchemaBuilder):
+            return schema
+        builder = SchemaBuilder(schema["json_schema"]["name"])
+        builder.properties = dict(schema["json_schema"]["schema"]["properties"])
+        builder.required = list(schema["json_schema"]["schema"].get("required", []))
+        return builder
@@ -0,0 +1,191 @@
+# prompt_breaker.py
+"""
+Circuit breakers per provider and model, so requests fail fast while an endpoint is down instead of waiting
+for the request timeout.
+
+Includes:
+- `BREAKER_STATES`: "closed" (requests pass), "open" (requests are refused) and "half_open" (a few trial
+  requests probe whether the endpoint recovered).
+- `CircuitOpenError`: Raised instead of sending a request through an open breaker; a
+  `requests.exceptions.RequestException`, so the text prompts return None as for any failed request.
+- `CircuitBreaker`: Error rate and latency over the last requests of one endpoint; opens when too many of them
+  failed or were slower than `slow_call_seconds`, and closes again after successful trial requests.
+- `CircuitBreakerRegistry`: One breaker per (base URL, model) with shared settings and a `snapshot()` of every
+  breaker's state for monitoring; `set_breakers()` on the text prompts guards every request with it.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+BREAKER_STATES = ("closed", "open", "half_open")
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    def __init__(self, key: Tuple[str, str], retry_in: float):
+        super().__init__(f"Circuit open for model '{key[1]}' at {key[0]}; retry in {retry_in:.1f}s")
+        self.key = key
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, key: Tuple[str, str] = ("", ""), failure_rate: float = 0.5, window: int = 20,
+                 min_requests: int = 5, slow_call_seconds: Optional[float] = None, open_seconds: float = 30.0,
+                 half_open_requests: int = 1,
+                 on_state_change: Optional[Callable[[Tuple[str, str], str, str], None]] = None):
+        """
+        :param key: (base URL, model) the breaker guards; used in logs and errors.
+        :param failure_rate: Fraction of failed (or slow) requests in the window that opens the breaker.
+        :param window: Number of most recent requests the rate is computed over.
+        :param min_requests: Requests needed in the window before the breaker can open.
+        :param slow_call_seconds: Requests slower than this count as failures; None to only count errors.
+        :param open_seconds: Time an open breaker refuses requests before letting trial requests through.
+        :param half_open_requests: Trial requests allowed at a time, and successes needed to close again.
+        :param on_state_change: Called with (key, old state, new state) on every transition.
+        """
+        self.key = key
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_requests = half_open_requests
+        self.on_state_change = on_state_change
+
+        self.state = "closed"
+        self.opened_at: Optional[float] = None
+        self.outcomes: deque = deque(maxlen=window)  # (failed, latency) per request
+        self.rejected = 0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    # Request gating
+    def allow(self) -> bool:
+        """Whether a request may be sent now; an expired open breaker turns half-open and admits trials."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.open_seconds:
+                self._transition("half_open")
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and self._trials < self.half_open_requests:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self):
+        """Like `allow`, but raises CircuitOpenError when the request may not be sent."""
+        if not self.allow():
+            raise CircuitOpenError(self.key, self.retry_in)
+
+    def record(self, success: bool, latency: float = 0.0):
+        """Record the outcome of a request that `allow` let through."""
+        failed = not success or (self.slow_call_seconds is not None and latency > self.slow_call_seconds)
+        with self._lock:
+            self.outcomes.append((failed, latency))
+            if self.state == "half_open":
+                self._trials = max(self._trials - 1, 0)
+                if failed:
+                    self._transition("open")
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_requests:
+                        self._transition("closed")
+            elif self.state == "closed" and failed and len(self.outcomes) >= self.min_requests \
+                    and self.error_rate >= self.failure_rate:
+                self._transition("open")
+
+    # State
+    @property
+    def available(self) -> bool:
+        """Whether a request would currently be admitted (without taking a trial slot)."""
+        if self.state == "open":
+            return self.retry_in <= 0
+        return self.state == "closed" or self._trials < self.half_open_requests
+
+    @property
+    def retry_in(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(self.open_seconds - (time.monotonic() - self.opened_at), 0.0)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(failed for failed, _ in self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def latency(self) -> Optional[float]:
+        return sum(latency for _, latency in self.outcomes) / len(self.outcomes) if self.outcomes else None
+
+    def reset(self):
+        with self._lock:
+            self.outcomes.clear()
+            self._transition("closed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.key[0],
+            "model": self.key[1],
+            "state": self.state,
+            "error_rate": self.error_rate,
+            "latency": self.latency,
+            "requests": len(self.outcomes),
+            "rejected": self.rejected,
+            "retry_in": self.retry_in,
+        }
+
+    # Helper methods
+    def _transition(self, state: str):
+        old, self.state = self.state, state
+        self._trials = 0
+        self._trial_successes = 0
+        if state == "open":
+            self.opened_at = time.monotonic()
+            logger.warning(f"⚠️ Circuit opened for '{self.key[1]}' at {self.key[0]} "
+                           f"({self.error_rate:.0%} of {len(self.outcomes)} requests failed); "
+                           f"refusing requests for {self.open_seconds:g}s")
+        elif state == "half_open":
+            logger.info(f"🔄 Circuit half-open for '{self.key[1]}'; sending trial requests")
+        elif old != "closed":
+            # Failures from before the outage must not reopen the breaker right away
+            self.outcomes.clear()
+            logger.info(f"✅ Circuit closed for '{self.key[1]}' at {self.key[0]}")
+        if self.on_state_change and old != state:
+            self.on_state_change(self.key, old, state)
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, **settings):
+        """
+        :param settings: `CircuitBreaker` options applied to every breaker (failure_rate, window, min_requests,
+            slow_call_seconds, open_seconds, half_open_requests, on_state_change).
+        """
+        self.settings = settings
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url: str, model: str) -> CircuitBreaker:
+        key = (base_url, model)
+        with self._lock:
+            if key not in self.breakers:
+                self.breakers[key] = CircuitBreaker(key, **self.settings)
+            return self.breakers[key]
+
+    def available(self, base_url: str, model: str) -> bool:
+        breaker = self.breakers.get((base_url, model))
+        return breaker is None or breaker.available
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """State of every breaker, keyed by "<base_url>|<model>"."""
+        return {f"{base_url}|{model}": breaker.to_dict() for (base_url, model), breaker in list(self.breakers.items())}
+
+    def reset(self):
+        for breaker in list(self.breakers.values()):
+            breaker.reset()
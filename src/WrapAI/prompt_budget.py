@@ -0,0 +1,232 @@
+# prompt_budget.py
+"""
+Token budgets for rendering a `PromptTemplate` so the prompt fits the target model.
+
+Includes:
+- `FIT_STRATEGIES`: "truncate" (keep the head) or "select" (keep the paragraphs most related to the rest of the
+  prompt, in their original order).
+- `PlaceholderCut`: Tokens a placeholder had, was allowed and kept, and how it was cut.
+- `BudgetReport`: The budget, the template's own tokens and one `PlaceholderCut` per filled placeholder.
+- `PromptBudget`: Allocates a token budget across `<< var >>`, `%% file %%` and `@@ output @@` placeholders by
+  priority, then by weight, and fits each value to its share; `for_model` derives the budget from the model
+  catalog (`availableContextTokens` minus room for `max_completion_tokens`).
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .utils.tokens_char import get_encoding
+
+FIT_STRATEGIES = ("truncate", "select")
+TRUNCATION_MARKER = "\n[…]"
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WORD = re.compile(r"\w{3,}")
+
+# Placeholder key: (kind, name) with kind "text", "file" or "output"
+PlaceholderKey = Tuple[str, str]
+
+
+@dataclass
+class PlaceholderCut:
+    name: str
+    kind: str
+    original_tokens: int
+    allowed_tokens: int
+    kept_tokens: int
+    strategy: str = "kept"
+
+    @property
+    def cut_tokens(self) -> int:
+        return self.original_tokens - self.kept_tokens
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    fixed_tokens: int
+    placeholders: List[PlaceholderCut] = field(default_factory=list)
+    rendered_tokens: Optional[int] = None
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of the rendered prompt, or the sum of its parts before it was rendered."""
+        if self.rendered_tokens is not None:
+            return self.rendered_tokens
+        return self.fixed_tokens + sum(p.kept_tokens for p in self.placeholders)
+
+    @property
+    def fits(self) -> bool:
+        return self.total_tokens <= self.budget
+
+    @property
+    def cuts(self) -> List[PlaceholderCut]:
+        return [p for p in self.placeholders if p.cut_tokens > 0]
+
+    def summary(self) -> str:
+        cuts = ", ".join(f"{p.kind} '{p.name}' {p.original_tokens}→{p.kept_tokens} ({p.strategy})" for p in self.cuts)
+        return f"{self.total_tokens}/{self.budget} tokens" + (f"; cut {cuts}" if cuts else "")
+
+
+class PromptBudget:
+    def __init__(self, max_tokens: int, weights: Optional[Dict[str, float]] = None,
+                 priorities: Optional[Dict[str, int]] = None, strategies: Optional[Dict[str, str]] = None,
+                 default_strategy: str = "truncate", model: str = "gpt-3.5-turbo"):
+        """
+        :param max_tokens: Tokens the rendered prompt may use.
+        :param weights: Share of the budget per placeholder name when several must be cut (default 1.0).
+        :param priorities: Higher-priority placeholders are filled completely before lower ones get any
+            budget (default 0).
+        :param strategies: One of FIT_STRATEGIES per placeholder name; others use `default_strategy`.
+        :param model: Model whose tokenizer counts the tokens.
+        """
+        for strategy in [default_strategy, *(strategies or {}).values()]:
+            if strategy not in FIT_STRATEGIES:
+                raise ValueError(f"Unknown fit strategy '{strategy}'. Use one of {FIT_STRATEGIES}")
+        self.max_tokens = max_tokens
+        self.weights = weights or {}
+        self.priorities = priorities or {}
+        self.strategies = strategies or {}
+        self.default_strategy = default_strategy
+        self.model = model
+
+    @classmethod
+    def for_model(cls, models, model_name: str, max_completion_tokens: int = 0, reserved_tokens: int = 0,
+                  safety_margin: float = 0.05, **kwargs) -> "PromptBudget":
+        """
+        Budget for `model_name` from a fetched `VeniceModels` catalog.
+
+        :param max_completion_tokens: Room kept for the answer.
+        :param reserved_tokens: Room kept for everything else sent with the prompt (system prompt, history).
+        :param safety_margin: Fraction of the context held back because the model's tokenizer may count
+            differently from tiktoken.
+        """
+        if not models.models_data:
+            models.fetch_models()
+        context = models.get_tokens_by_model_name(model_name)
+        if not isinstance(context, int):
+            raise ValueError(f"No availableContextTokens for model '{model_name}'")
+        max_tokens = int(context * (1 - safety_margin)) - max_completion_tokens - reserved_tokens
+        if max_tokens <= 0:
+            raise ValueError(f"Model '{model_name}' has no room for a prompt: context {context}, "
+                             f"max_completion_tokens {max_completion_tokens}, reserved {reserved_tokens}")
+        return cls(max_tokens, **kwargs)
+
+    def count(self, text: str) -> int:
+        return len(get_encoding(self.model).encode_ordinary(text))
+
+    def fit(self, fixed_text: str, contents: Dict[PlaceholderKey, str],
+            occurrences: Optional[Dict[PlaceholderKey, int]] = None) -> Tuple[Dict[PlaceholderKey, str], BudgetReport]:
+        """
+        Fit placeholder values into the budget left by the template's own text.
+
+        :param fixed_text: The template with its placeholders removed.
+        :param contents: Value per placeholder.
+        :param occurrences: How often each placeholder appears in the template (default once).
+        :return: (fitted values, report)
+        """
+        occurrences = occurrences or {}
+        report = BudgetReport(self.max_tokens, self.count(fixed_text))
+        sizes = {key: self.count(text) * occurrences.get(key, 1) for key, text in contents.items()}
+        allowed = self.allocate(self.max_tokens - report.fixed_tokens, sizes)
+        context = " ".join([fixed_text, *(text for (kind, _), text in contents.items() if kind == "text")])
+
+        fitted = {}
+        for key, text in contents.items():
+            kind, name = key
+            times = occurrences.get(key, 1)
+            if sizes[key] <= allowed[key]:
+                fitted[key] = text
+                report.placeholders.append(PlaceholderCut(name, kind, sizes[key], allowed[key], sizes[key]))
+                continue
+            strategy = self.strategies.get(name, self.default_strategy)
+            fitted[key] = self._fit_value(text, allowed[key] // times, strategy, context)
+            kept = self.count(fitted[key]) * times
+            report.placeholders.append(PlaceholderCut(name, kind, sizes[key], allowed[key], kept, strategy))
+
+        if report.cuts:
+            logger.warning(f"⚠️ Prompt over budget; {report.summary()}")
+        return fitted, report
+
+    def allocate(self, available: int, sizes: Dict[PlaceholderKey, int]) -> Dict[PlaceholderKey, int]:
+        """
+        Split `available` tokens across placeholders: priority groups in descending order, and within a group
+        proportionally to weight, with whatever a small placeholder does not need passed on to the others.
+        """
+        allowed = {}
+        remaining = max(available, 0)
+        for priority in sorted({self.priorities.get(name, 0) for _, name in sizes}, reverse=True):
+            pending = [key for key in sizes if self.priorities.get(key[1], 0) == priority]
+            while pending:
+                total_weight = sum(self.weights.get(name, 1.0) for _, name in pending)
+                shares = {key: remaining * self.weights.get(key[1], 1.0) / total_weight if total_weight else 0
+                          for key in pending}
+                satisfied = [key for key in pending if sizes[key] <= shares[key]]
+                if not satisfied:
+                    for key in pending:
+                        allowed[key] = int(shares[key])
+                    remaining -= sum(allowed[key] for key in pending)
+                    break
+                for key in satisfied:
+                    allowed[key] = sizes[key]
+                    remaining -= sizes[key]
+                    pending.remove(key)
+        return allowed
+
+    # Helper methods
+    def _fit_value(self, text: str, max_tokens: int, strategy: str, context: str) -> str:
+        if max_tokens <= 0:
+            return ""
+        if strategy == "select":
+            return self._select(text, max_tokens, context)
+        return self._truncate(text, max_tokens)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        encoding = get_encoding(self.model)
+        marker_tokens = len(encoding.encode_ordinary(TRUNCATION_MARKER))
+        if max_tokens <= marker_tokens:
+            return encoding.decode(encoding.encode_ordinary(text)[:max_tokens])
+        return encoding.decode(encoding.encode_ordinary(text)[:max_tokens - marker_tokens]) + TRUNCATION_MARKER
+
+    def _select(self, text: str, max_tokens: int, context: str) -> str:
+        """Keep the paragraphs sharing the most words with the rest of the prompt, in document order."""
+        paragraphs = [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+        query = {word.lower() for word in _WORD.findall(context)}
+        ranked = sorted(range(len(paragraphs)), key=lambda i: (-self._relevance(paragraphs[i], query), i))
+
+        separator_tokens = self.count(f"\n\n{TRUNCATION_MARKER.strip()}\n\n")
+        chosen, used = set(), 0
+        for i in ranked:
+            cost = self.count(paragraphs[i]) + separator_tokens
+            if used + cost <= max_tokens:
+                chosen.add(i)
+                used += cost
+
+        parts, skipped = [], False
+        for i, paragraph in enumerate(paragraphs):
+            if i in chosen:
+                if skipped:
+                    parts.append(TRUNCATION_MARKER.strip())
+                parts.append(paragraph)
+                skipped = False
+            else:
+                skipped = True
+        if skipped:
+            parts.append(TRUNCATION_MARKER.strip())
+        selected = "\n\n".join(parts)
+        # Nothing small enough to keep whole (or separators undercounted): fall back to the head
+        if not chosen or self.count(selected) > max_tokens:
+            return self._truncate(text, max_tokens)
+        return selected
+
+    @staticmethod
+    def _relevance(paragraph: str, query: set) -> float:
+        words = [word.lower() for word in _WORD.findall(paragraph)]
+        if not words:
+            return 0.0
+        return sum(word in query for word in words) / len(words)
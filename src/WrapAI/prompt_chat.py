@@ -31,8 +31,7 @@ class VeniceChatPrompt:
         self.model = model
 
         # Initialize model token manager
-        self._models = VeniceModels(api_key)
-        self._models.fetch_models()
+        self._models = VeniceModels.cached(api_key)
 
         model_token_limit = self._models.get_tokens_by_model_name(model)
         if isinstance(model_token_limit, int):
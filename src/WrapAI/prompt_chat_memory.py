@@ -4,9 +4,10 @@ Conversation memory manager for AI chat sessions.
 
 Includes:
 - `ConversationMemory`: Tracks messages, manages token limits, trims history,
-  and supports system prompt updates and summarization.
+  and supports system prompt updates, summarization and tool-call turns.
 """
 
+import json
 import logging
 from typing import List, Dict, Any, Optional
 
@@ -21,7 +22,7 @@ class ConversationMemory:
     def __init__(self, system_prompt: str = "",
                  max_tokens: int = WSChatMemoryDefaults.MAX_TOKENS,
                  token_buffer: int = WSChatMemoryDefaults.TOKEN_BUFFER):
-        self.messages: List[Dict[str, str]] = []
+        self.messages: List[Dict[str, Any]] = []
         self.max_tokens: int = max_tokens
         self.token_buffer: int = token_buffer
         self.current_tokens: int = 0
@@ -49,23 +50,29 @@ class ConversationMemory:
         """Add message to memory with automatic trimming if needed."""
         if role not in {"user", "assistant", "system"}:
             logger.warning(f"Unexpected role '{role}' in message.")
+        self._append({"role": role, "content": content})
 
-        new_msg = {"role": role, "content": content}
-        tokens = self.calculate_tokens(content)
+    def add_tool_calls(self, tool_calls: List[Dict[str, Any]], content: Optional[str] = None) -> None:
+        """Add the assistant turn that requested `tool_calls` (as returned in `PromptResponse.tool_calls`)."""
+        self._append({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
 
-        if self._will_exceed_limit(tokens):
-            self.trim_messages(tokens)
-
-        self.messages.append(new_msg)
-        self.current_tokens += tokens
+    def add_tool_result(self, tool_call_id: str, content: str, name: Optional[str] = None) -> None:
+        """Add the result of one tool call; it must follow the assistant turn that requested it."""
+        message = {"role": "tool", "tool_call_id": tool_call_id, "content": content}
+        if name:
+            message["name"] = name
+        self._append(message)
 
-    def trim_messages(self, incoming_tokens: int = 0) -> None:
-        """Remove oldest non-system messages until under token limit."""
+    def trim_messages(self, incoming_tokens: int = 0, keep_last: int = 0) -> None:
+        """Remove oldest non-system messages until under token limit, never touching the last `keep_last`."""
         target = self.max_tokens - self.token_buffer - incoming_tokens
-        while self.current_tokens > target and len(self.messages) > 1:
+        while self.current_tokens > target and len(self.messages) > 1 + keep_last:
             # Keep system prompt (index 0), remove oldest message after that (index 1)
             removed = self.messages.pop(1)
-            removed_tokens = self.calculate_tokens(removed["content"])
+            removed_tokens = self.message_tokens(removed)
+            # Tool results are invalid without the assistant turn that requested them
+            while len(self.messages) > 1 and self.messages[1]["role"] == "tool":
+                removed_tokens += self.message_tokens(self.messages.pop(1))
             self.current_tokens -= removed_tokens
             logger.debug(f"Trimmed message with {removed_tokens} tokens to stay under limit")
 
@@ -75,6 +82,8 @@ class ConversationMemory:
 
         # Preserve last 2 exchanges (up to 4 messages: 2 user, 2 assistant)
         recent = self.messages[-4:] if len(self.messages) >= 4 else self.messages[1:] if len(self.messages) > 1 else []
+        while recent and recent[0]["role"] == "tool":
+            recent = recent[1:]
 
         # New message list with system prompt + summary and recent messages
         self.messages = [
@@ -86,7 +95,7 @@ class ConversationMemory:
 
         # Recalculate tokens
         self.current_tokens = sum(
-            self.calculate_tokens(msg["content"])
+            self.message_tokens(msg)
             for msg in self.messages
         )
 
@@ -95,12 +104,37 @@ class ConversationMemory:
         _, tokens = count_characters_and_tokens(text)
         return tokens
 
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """Tokens of a message's content plus any tool calls it carries."""
+        tokens = self.calculate_tokens(message.get("content") or "")
+        if message.get("tool_calls"):
+            tokens += self.calculate_tokens(json.dumps(message["tool_calls"]))
+        return tokens
+
+    def _append(self, message: Dict[str, Any]) -> None:
+        tokens = self.message_tokens(message)
+        if self._will_exceed_limit(tokens):
+            # A tool result must keep the assistant turn that requested it (and the turn's earlier results)
+            self.trim_messages(tokens, self._open_tool_turn() if message["role"] == "tool" else 0)
+        self.messages.append(message)
+        self.current_tokens += tokens
+
+    def _open_tool_turn(self) -> int:
+        """Number of trailing messages that make up the tool-call turn being answered."""
+        for index in range(len(self.messages) - 1, 0, -1):
+            role = self.messages[index]["role"]
+            if role == "assistant" and self.messages[index].get("tool_calls"):
+                return len(self.messages) - index
+            if role != "tool":
+                break
+        return 0
+
     def _will_exceed_limit(self, incoming: int) -> bool:
         """Check if adding incoming tokens would exceed the limit."""
         return (self.current_tokens + incoming) > (self.max_tokens - self.token_buffer)
 
     @property
-    def message_history(self) -> List[Dict[str, str]]:
+    def message_history(self) -> List[Dict[str, Any]]:
         """Return a copy of the current message history."""
         return self.messages.copy()
 
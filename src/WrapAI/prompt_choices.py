@@ -0,0 +1,78 @@
+# prompt_choices.py
+"""
+Selection among the candidate answers of a multi-choice (`n` > 1) request.
+
+Includes:
+- `select_by`: The choice with the highest score from any callable.
+- `select_longest` / `select_shortest`: By answer length.
+- `select_majority`: The most common answer after normalization (self-consistency voting), with its vote count.
+- `select_valid`: The first choice whose answer parses against a structured-output schema, with the parsed dict.
+- `unique_choices`: Choices with duplicate answers removed, order kept.
+"""
+
+import re
+import json
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_response import PromptResponse
+from .schema_parser import parse_response_with_schema
+
+
+def _default_normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().rstrip(".").lower()
+
+
+def select_by(choices: List[PromptResponse], score: Callable[[PromptResponse], float]) -> Optional[PromptResponse]:
+    """Return the choice with the highest score (the first one on ties), or None for no choices."""
+    return max(choices, key=score, default=None)
+
+
+def select_longest(choices: List[PromptResponse]) -> Optional[PromptResponse]:
+    return select_by(choices, lambda choice: len(choice.response or ""))
+
+
+def select_shortest(choices: List[PromptResponse]) -> Optional[PromptResponse]:
+    return select_by(choices, lambda choice: -len(choice.response or ""))
+
+
+def select_majority(choices: List[PromptResponse], normalize: Callable[[str], str] = _default_normalize
+                    ) -> Tuple[Optional[PromptResponse], int]:
+    """
+    Return the first choice of the most common answer and how many choices agreed with it.
+
+    :param normalize: Maps an answer to the value that is voted on (default: case, whitespace and a final
+        period ignored). Use e.g. a label extractor for classification prompts.
+    """
+    if not choices:
+        return None, 0
+    keys = [normalize(choice.response or "") for choice in choices]
+    winner, votes = Counter(keys).most_common(1)[0]
+    return choices[keys.index(winner)], votes
+
+
+def select_valid(choices: List[PromptResponse], schema_json: Dict[str, Any]
+                 ) -> Tuple[Optional[PromptResponse], Optional[dict]]:
+    """Return the first choice whose JSON answer satisfies `schema_json`, with the parsed dict; (None, None) if none do."""
+    for choice in choices:
+        try:
+            return choice, parse_response_with_schema(json.loads(choice.response or ""), schema_json)
+        except ValueError as e:
+            logger.debug(f"Choice rejected by schema: {e}")
+    return None, None
+
+
+def unique_choices(choices: List[PromptResponse], normalize: Callable[[str], str] = _default_normalize
+                   ) -> List[PromptResponse]:
+    seen = set()
+    unique = []
+    for choice in choices:
+        key = normalize(choice.response or "")
+        if key not in seen:
+            seen.add(key)
+            unique.append(choice)
+    return unique
@@ -0,0 +1,155 @@
+# prompt_compression.py
+"""
+Optional pre-send compression of rendered prompts and chat messages.
+
+Includes:
+- `LOW_VALUE_SECTIONS`: Heading titles commonly safe to drop (table of contents, references, changelog, ...).
+- `CompressionReport`: Token and character counts before/after, counted with tiktoken, and the steps applied.
+- `PromptCompressor`: Drops listed sections, dedupes repeated boilerplate lines, collapses whitespace and, when
+  enabled, strips markdown; set it on a text prompt with `set_compressor()` to apply it to every request.
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .utils.markdown import STRING_CLEANER
+from .utils.tokens_char import count_characters_and_tokens
+
+LOW_VALUE_SECTIONS = ("table of contents", "contents", "references", "bibliography", "acknowledgements",
+                      "acknowledgments", "changelog", "license")
+
+_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_TRAILING_SPACES = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINE_RUNS = re.compile(r"\n{3,}")
+
+
+@dataclass
+class CompressionReport:
+    original_tokens: int = 0
+    compressed_tokens: int = 0
+    original_chars: int = 0
+    compressed_chars: int = 0
+    steps: List[str] = field(default_factory=list)
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compressed_tokens
+
+    @property
+    def ratio(self) -> float:
+        return self.saved_tokens / self.original_tokens if self.original_tokens else 0.0
+
+    def add(self, other: "CompressionReport"):
+        self.original_tokens += other.original_tokens
+        self.compressed_tokens += other.compressed_tokens
+        self.original_chars += other.original_chars
+        self.compressed_chars += other.compressed_chars
+        self.steps.extend(step for step in other.steps if step not in self.steps)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"original_tokens": self.original_tokens, "compressed_tokens": self.compressed_tokens,
+                "saved_tokens": self.saved_tokens, "ratio": round(self.ratio, 4),
+                "original_chars": self.original_chars, "compressed_chars": self.compressed_chars,
+                "steps": list(self.steps)}
+
+
+class PromptCompressor:
+    def __init__(self, strip_markdown: bool = False, collapse_whitespace: bool = True, dedupe_lines: bool = True,
+                 drop_sections: Sequence[str] = (), min_dedupe_length: int = 20,
+                 roles: Sequence[str] = ("system", "user"), model: str = "gpt-3.5-turbo"):
+        """
+        :param strip_markdown: Remove markdown syntax with the shared `MarkdownCleaner`. Off by default: it
+            rewrites content as well as markup (fenced code is removed, `_`/`*` inside identifiers and formulas
+            are dropped), so enable it only for prose-only prompts.
+        :param collapse_whitespace: Drop trailing spaces and squeeze runs of blank lines to one.
+        :param dedupe_lines: Keep only the first copy of a repeated line (headers, footers, disclaimers).
+        :param drop_sections: Markdown heading titles (case-insensitive regexes, e.g. `LOW_VALUE_SECTIONS`)
+            whose sections are removed up to the next heading of the same or a higher level.
+        :param min_dedupe_length: Shorter lines are never deduped, so list markers or braces survive.
+        :param roles: Message roles compressed by `compress_messages`; assistant turns are left as sent.
+        :param model: Model whose tokenizer counts the tokens in the report.
+        """
+        self.strip_markdown = strip_markdown
+        self.collapse_whitespace = collapse_whitespace
+        self.dedupe_lines = dedupe_lines
+        self.drop_sections = [re.compile(rf"^(?:{pattern})$", re.IGNORECASE) for pattern in drop_sections]
+        self.min_dedupe_length = min_dedupe_length
+        self.roles = tuple(roles)
+        self.model = model
+
+    def compress(self, text: str) -> Tuple[str, CompressionReport]:
+        """Compress one prompt; returns the text and its report."""
+        steps = []
+        compressed = text
+        if self.drop_sections:
+            compressed = self._apply(self._drop_sections, compressed, "dropped sections", steps)
+        if self.dedupe_lines:
+            compressed = self._apply(self._dedupe_lines, compressed, "deduped lines", steps)
+        if self.strip_markdown:
+            compressed = self._apply(STRING_CLEANER.clean, compressed, "stripped markdown", steps)
+        if self.collapse_whitespace:
+            compressed = self._apply(self._collapse_whitespace, compressed, "collapsed whitespace", steps)
+
+        _, original_tokens = count_characters_and_tokens(text, self.model)
+        _, compressed_tokens = count_characters_and_tokens(compressed, self.model)
+        return compressed, CompressionReport(original_tokens, compressed_tokens, len(text), len(compressed), steps)
+
+    def compress_messages(self, messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], CompressionReport]:
+        """Compress the string content of messages in `roles`; returns new message dicts and the total report."""
+        report = CompressionReport()
+        compressed = []
+        for message in messages:
+            content = message.get("content")
+            if message.get("role") in self.roles and isinstance(content, str) and content:
+                content, message_report = self.compress(content)
+                report.add(message_report)
+                message = {**message, "content": content}
+            compressed.append(message)
+        return compressed, report
+
+    # Helper methods
+    @staticmethod
+    def _apply(step, text: str, name: str, steps: List[str]) -> str:
+        result = step(text)
+        if result != text:
+            steps.append(name)
+        return result
+
+    def _drop_sections(self, text: str) -> str:
+        kept = []
+        dropping_level = None
+        in_fence = False
+        for line in text.splitlines(keepends=True):
+            if line.lstrip().startswith("```"):
+                in_fence = not in_fence
+            heading = None if in_fence else _HEADING.match(line)
+            if heading:
+                level = len(heading.group(1))
+                if dropping_level is not None and level <= dropping_level:
+                    dropping_level = None
+                if dropping_level is None and any(p.match(heading.group(2)) for p in self.drop_sections):
+                    dropping_level = level
+            if dropping_level is None:
+                kept.append(line)
+        return "".join(kept)
+
+    def _dedupe_lines(self, text: str) -> str:
+        seen = set()
+        kept = []
+        for line in text.splitlines(keepends=True):
+            key = " ".join(line.split())
+            if len(key) >= self.min_dedupe_length:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        return "".join(kept)
+
+    @staticmethod
+    def _collapse_whitespace(text: str) -> str:
+        return _BLANK_LINE_RUNS.sub("\n\n", _TRAILING_SPACES.sub("", text)).strip()
@@ -0,0 +1,296 @@
+# prompt_library_index.py
+"""
+Indexed, lazily materialized prompt library backed by a JSON file.
+
+Includes:
+- `PromptIndexEntry`: Byte offset, length and digest of one prompt in the source file.
+- `IndexedPromptLibrary`: Read-only `PromptLibrary` alternative that keeps an on-disk
+  index, builds `PromptTemplate` objects on first access, maintains `type`/`subtype`
+  indexes and reloads only changed entries when the source file's mtime moves.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_template import PromptTemplate
+from .prompt_library import PromptLibrary
+from .utils.json import JsonOffsetScanner
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index.json"
+
+
+@dataclass(frozen=True)
+class PromptIndexEntry:
+    name: str
+    offset: int
+    length: int
+    digest: str
+    type: str = ""
+    subtype: str = ""
+
+
+@dataclass(frozen=True)
+class _IndexSnapshot:
+    """Immutable view of the index; replaced as a whole on reload so readers never lock."""
+    mtime_ns: int
+    size: int
+    entries: Dict[str, PromptIndexEntry]
+    by_type: Dict[str, Tuple[str, ...]]
+    by_subtype: Dict[str, Tuple[str, ...]]
+
+
+class IndexedPromptLibrary:
+    def __init__(self, file_path: str | Path, index_path: Optional[str | Path] = None,
+                 check_interval: float = 1.0, persist_index: bool = True):
+        self.file_path = Path(file_path)
+        self.index_path = Path(index_path) if index_path else self.file_path.with_name(
+            self.file_path.name + INDEX_SUFFIX)
+        self.check_interval = check_interval
+        self.persist_index = persist_index
+
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        # name -> (digest, template); entries whose digest changed are simply never hit again
+        self._templates: Dict[str, Tuple[str, PromptTemplate]] = {}
+        self._snapshot: _IndexSnapshot = self._load_or_build_index()
+
+    @classmethod
+    def from_json_file(cls, file_path: str | Path, **kwargs) -> "IndexedPromptLibrary":
+        return cls(file_path, **kwargs)
+
+    # PromptLibrary-compatible accessors
+    def list_prompts(self) -> List[str]:
+        return list(self._current().entries.keys())
+
+    def get_prompt(self, name: str) -> Optional[PromptTemplate]:
+        snapshot = self._current()
+        entry = snapshot.entries.get(name)
+        if entry is None:
+            return None
+
+        cached = self._templates.get(name)
+        if cached and cached[0] == entry.digest:
+            return cached[1]
+
+        template = self._materialize(entry)
+        if template is None:
+            # The file moved under us between the stat and the read; rebuild and retry once.
+            snapshot = self.reload()
+            entry = snapshot.entries.get(name)
+            template = self._materialize(entry) if entry else None
+            if template is None:
+                return None
+
+        self._templates[name] = (entry.digest, template)
+        return template
+
+    def get_prompt_with_system_prompt(self, name: str) -> tuple[Optional[PromptTemplate], str]:
+        prompt = self.get_prompt(name)
+        system_prompt = self.resolve_system_prompt(prompt) if prompt else ""
+        return prompt, system_prompt
+
+    def resolve_system_prompt(self, prompt: PromptTemplate) -> str:
+        if prompt.custom_system_prompt_name:
+            custom = self.get_prompt(prompt.custom_system_prompt_name)
+            if custom and custom.type == "system":
+                return custom.prompt_text
+        return prompt.prompt_system_text
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._current().entries
+
+    def __len__(self) -> int:
+        return len(self._current().entries)
+
+    # Secondary index lookups
+    def list_types(self) -> List[str]:
+        return list(self._current().by_type.keys())
+
+    def list_subtypes(self) -> List[str]:
+        return list(self._current().by_subtype.keys())
+
+    def list_prompts_by_type(self, prompt_type: str, subtype: Optional[str] = None) -> List[str]:
+        snapshot = self._current()
+        names = snapshot.by_type.get(prompt_type, ())
+        if subtype is not None:
+            names = [n for n in names if snapshot.entries[n].subtype == subtype]
+        return list(names)
+
+    def list_prompts_by_subtype(self, subtype: str) -> List[str]:
+        return list(self._current().by_subtype.get(subtype, ()))
+
+    def get_prompts_by_type(self, prompt_type: str, subtype: Optional[str] = None) -> Dict[str, PromptTemplate]:
+        return self._get_many(self.list_prompts_by_type(prompt_type, subtype))
+
+    def get_prompts_by_subtype(self, subtype: str) -> Dict[str, PromptTemplate]:
+        return self._get_many(self.list_prompts_by_subtype(subtype))
+
+    def to_prompt_library(self) -> PromptLibrary:
+        """Materialize every entry into a regular in-memory PromptLibrary."""
+        return PromptLibrary(prompts=self._get_many(self.list_prompts()))
+
+    # Reload methods
+    def check_for_updates(self, force: bool = False) -> bool:
+        """Reload changed entries if the source file's mtime or size moved. Returns True if reloaded."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        try:
+            stat = self.file_path.stat()
+        except OSError as e:
+            logger.error(f"Cannot stat prompt library {self.file_path}: {e}")
+            return False
+
+        snapshot = self._snapshot
+        if stat.st_mtime_ns == snapshot.mtime_ns and stat.st_size == snapshot.size:
+            return False
+        return self.reload(force=False) is not snapshot
+
+    def reload(self, force: bool = True) -> "_IndexSnapshot":
+        """
+        Rescan the source file and swap in a new index, keeping templates whose entry is unchanged.
+
+        :param force: Rescan even if another thread already reloaded the file at its current mtime and size.
+        :return: The new snapshot, or the previous one when the file is unchanged or cannot be parsed (e.g. it is
+            being written); the next check retries.
+        """
+        with self._reload_lock:
+            old = self._snapshot
+            try:
+                if not force:
+                    stat = self.file_path.stat()
+                    if stat.st_mtime_ns == old.mtime_ns and stat.st_size == old.size:
+                        return old
+                new = self._build_index()
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Cannot reload prompt library {self.file_path}, keeping the previous index: {e}")
+                return old
+
+            changed = [n for n, e in new.entries.items() if n not in old.entries or old.entries[n].digest != e.digest]
+            removed = [n for n in old.entries if n not in new.entries]
+            for name in changed + removed:
+                self._templates.pop(name, None)
+
+            self._snapshot = new
+            self._save_index(new)
+            logger.info(f"🔄 Reloaded prompt library {self.file_path}: "
+                        f"{len(changed)} changed, {len(removed)} removed, {len(new.entries)} total")
+            return new
+
+    # Internal methods
+    def _current(self) -> _IndexSnapshot:
+        self.check_for_updates()
+        return self._snapshot
+
+    def _get_many(self, names: List[str]) -> Dict[str, PromptTemplate]:
+        prompts = {}
+        for name in names:
+            template = self.get_prompt(name)
+            if template is not None:
+                prompts[name] = template
+        return prompts
+
+    def _materialize(self, entry: PromptIndexEntry) -> Optional[PromptTemplate]:
+        try:
+            with self.file_path.open("rb") as f:
+                f.seek(entry.offset)
+                raw = f.read(entry.length)
+        except OSError as e:
+            logger.error(f"Error reading prompt '{entry.name}' from {self.file_path}: {e}")
+            return None
+
+        if hashlib.sha256(raw).hexdigest() != entry.digest:
+            logger.debug(f"Stale index entry for '{entry.name}', source file changed.")
+            return None
+        return PromptTemplate.from_dict(json.loads(raw))
+
+    def _load_or_build_index(self) -> _IndexSnapshot:
+        snapshot = self._load_index()
+        if snapshot is not None:
+            return snapshot
+        snapshot = self._build_index()
+        self._save_index(snapshot)
+        return snapshot
+
+    def _load_index(self) -> Optional[_IndexSnapshot]:
+        if not self.persist_index or not self.index_path.exists():
+            return None
+        try:
+            stat = self.file_path.stat()
+            with self.index_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if (data.get("version") != INDEX_VERSION or data.get("mtime_ns") != stat.st_mtime_ns
+                    or data.get("size") != stat.st_size):
+                logger.debug(f"Prompt index {self.index_path} is stale, rebuilding.")
+                return None
+            entries = {item["name"]: PromptIndexEntry(**item) for item in data.get("entries", [])}
+            logger.debug(f"Loaded prompt index {self.index_path} ({len(entries)} entries)")
+            return self._make_snapshot(data["mtime_ns"], data["size"], entries)
+        except (OSError, KeyError, TypeError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable prompt index {self.index_path}: {e}")
+            return None
+
+    def _save_index(self, snapshot: _IndexSnapshot):
+        if not self.persist_index:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "source": self.file_path.name,
+            "mtime_ns": snapshot.mtime_ns,
+            "size": snapshot.size,
+            "entries": [asdict(e) for e in snapshot.entries.values()],
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write prompt index {self.index_path}: {e}")
+
+    def _build_index(self) -> _IndexSnapshot:
+        stat = self.file_path.stat()
+        raw = self.file_path.read_bytes()
+        scanner = JsonOffsetScanner(raw)
+        top, _ = scanner.object_spans(scanner.skip_ws(0))
+        data_spans = scanner.object_spans(top["data"][0])[0] if "data" in top else {}
+        entries = {}
+        for name, (start, end) in data_spans.items():
+            item = scanner.decode((start, end))
+            entries[name] = PromptIndexEntry(
+                name=name,
+                offset=start,
+                length=end - start,
+                digest=hashlib.sha256(raw[start:end]).hexdigest(),
+                type=item.get("type", "") if isinstance(item, dict) else "",
+                subtype=item.get("subtype", "") if isinstance(item, dict) else "",
+            )
+        return self._make_snapshot(stat.st_mtime_ns, stat.st_size, entries)
+
+    @staticmethod
+    def _make_snapshot(mtime_ns: int, size: int, entries: Dict[str, PromptIndexEntry]) -> _IndexSnapshot:
+        by_type: Dict[str, List[str]] = {}
+        by_subtype: Dict[str, List[str]] = {}
+        for name, entry in entries.items():
+            by_type.setdefault(entry.type, []).append(name)
+            by_subtype.setdefault(entry.subtype, []).append(name)
+        return _IndexSnapshot(
+            mtime_ns=mtime_ns,
+            size=size,
+            entries=entries,
+            by_type={k: tuple(v) for k, v in by_type.items()},
+            by_subtype={k: tuple(v) for k, v in by_subtype.items()},
+        )
+
@@ -0,0 +1,296 @@
+# prompt_pipeline.py
+"""
+Concurrent executor for chained prompts.
+
+Includes:
+- `PromptGraph`: Dependency graph built from `@@name@@` output placeholders in a prompt library.
+- `PipelineResult`: Responses, failures and timings of one pipeline run.
+- `PromptPipeline`: Runs independent prompts concurrently on a thread pool, feeds upstream
+  `PromptResponse.response` text into downstream placeholders and stores results in a
+  `DocumentManager`.
+"""
+
+import copy
+import time
+import dataclasses
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_text import OpenAITextPrompt, VeniceTextPrompt, DEFAULT_PROMPT_SYSTEM
+from .prompt_response import PromptResponse
+from .prompt_template import PromptTemplate
+from .schema_document import DocumentManager
+from .wv_core import BASE_URL
+
+
+class PromptGraph:
+    def __init__(self, library, names: Optional[List[str]] = None, external: Optional[Set[str]] = None):
+        """
+        Build the dependency graph for `names` (default: every prompt in the library).
+        Dependencies are pulled in transitively; names in `external` are treated as already available.
+        """
+        self.library = library
+        self.external = set(external or ())
+        self.templates: Dict[str, PromptTemplate] = {}
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+
+        pending = list(names if names is not None else library.list_prompts())
+        system_names: Set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in self.templates or name in self.external:
+                continue
+            template = library.get_prompt(name)
+            if template is None:
+                raise ValueError(f"Prompt '{name}' referenced by the pipeline is not in the library.")
+            if template.type == "system":
+                system_names.add(name)
+                continue
+            self.templates[name] = template
+            deps = set(template.get_output_placeholders()) - self.external
+            self.dependencies[name] = deps
+            pending.extend(deps)
+
+        for name, deps in self.dependencies.items():
+            system_deps = sorted(deps & system_names)
+            if system_deps:
+                raise ValueError(f"Prompt '{name}' depends on system prompt '{system_deps[0]}', which produces no "
+                                 f"output; reference it with custom_system_prompt_name instead of @@...@@")
+
+        for name, deps in self.dependencies.items():
+            self.dependents.setdefault(name, set())
+            for dep in deps:
+                self.dependents.setdefault(dep, set()).add(name)
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = sorted(name for name, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for child in sorted(self.dependents.get(name, ())):
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.dependencies):
+            cycle = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Cycle detected between prompts: {cycle}")
+        return order
+
+    def critical_path_length(self) -> int:
+        """Number of sequential steps when every independent node runs concurrently."""
+        depth: Dict[str, int] = {}
+        for name in self.order:
+            depth[name] = 1 + max((depth[d] for d in self.dependencies[name]), default=0)
+        return max(depth.values(), default=0)
+
+
+@dataclass
+class PipelineResult:
+    responses: Dict[str, PromptResponse] = field(default_factory=dict)
+    failed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    fresh: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return not self.failed and not self.skipped
+
+    def get_response(self, name: str) -> str:
+        response = self.responses.get(name)
+        return response.response if response else ""
+
+
+class PromptPipeline:
+    def __init__(self, library, api_key: str = "", model: str = "", base_url: str = BASE_URL,
+                 document_manager: Optional[DocumentManager] = None, max_workers: int = 4,
+                 client_factory: Optional[Callable[[], OpenAITextPrompt]] = None,
+                 save_after_each: bool = False):
+        """
+        :param library: A `PromptLibrary` or `IndexedPromptLibrary`.
+        :param document_manager: Optional document that receives each response as a named section.
+        :param client_factory: Builds a fresh text prompt client per node (clients hold per-request state).
+            Defaults to `VeniceTextPrompt(api_key, model, base_url)`.
+        :param save_after_each: Save the document after every node instead of once at the end.
+        """
+        self.library = library
+        self.document_manager = document_manager
+        self.max_workers = max_workers
+        self.save_after_each = save_after_each
+        self.client_factory = client_factory or (lambda: VeniceTextPrompt(api_key, model, base_url))
+        self._doc_lock = threading.Lock()
+
+    def build_graph(self, names: Optional[List[str]] = None, outputs: Optional[Dict[str, str]] = None) -> PromptGraph:
+        return PromptGraph(self.library, names, external=set(outputs or ()))
+
+    def run(self, values: Optional[Dict[str, str | Path]] = None, names: Optional[List[str]] = None,
+            outputs: Optional[Dict[str, str]] = None) -> PipelineResult:
+        """
+        Execute `names` (and everything they depend on) concurrently.
+
+        :param values: Values for `<< var >>` and `%% file %%` placeholders, shared by all nodes.
+        :param outputs: Pre-computed upstream outputs keyed by prompt name; those nodes are not run.
+        """
+        return self._execute(values, names, outputs, incremental=False)
+
+    def ensure_up_to_date(self, values: Optional[Dict[str, str | Path]] = None,
+                          names: Optional[List[str]] = None) -> PipelineResult:
+        """
+        Re-run only the stale sections of the document (make-style).
+
+        Each node is rendered with the current values and upstream outputs and its request hash is
+        compared to the hash stored for that section. Because the rendered prompt embeds `%% file %%`
+        contents and `@@name@@` outputs, a changed input file or a re-run upstream section whose text
+        changed makes the node stale; everything else is reused from the document.
+        Sections store the requested model and the system prompt they were sent with, so a different model
+        or an edited template/custom system prompt also makes the node stale.
+        """
+        if self.document_manager is None or not self.document_manager.document_header:
+            raise ValueError("ensure_up_to_date requires a document_manager with a header.")
+        return self._execute(values, names, None, incremental=True)
+
+    def _execute(self, values: Optional[Dict[str, str | Path]], names: Optional[List[str]],
+                 outputs: Optional[Dict[str, str]], incremental: bool) -> PipelineResult:
+        values = values or {}
+        outputs = dict(outputs or {})
+        graph = self.build_graph(names, outputs)
+        result = PipelineResult()
+        logger.info(f"🚀 Running pipeline: {len(graph.order)} prompts, critical path {graph.critical_path_length()}")
+
+        start = time.perf_counter()
+        remaining = {name: set(deps) for name, deps in graph.dependencies.items()}
+        running: Dict[Future, tuple[str, str]] = {}
+
+        def resolve(name: str, text: str):
+            outputs[name] = text
+            for child in graph.dependents.get(name, ()):
+                if child in remaining:
+                    remaining[child].discard(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit_ready():
+                # Fresh nodes resolve immediately and may unblock children, so sweep until nothing changes
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name in graph.order:
+                        if name not in remaining or remaining[name]:
+                            continue
+                        del remaining[name]
+                        client, user_prompt, system_prompt = self._prepare(graph.templates[name], values, outputs)
+
+                        if incremental and self._is_fresh(name, client, user_prompt, system_prompt):
+                            result.fresh.append(name)
+                            resolve(name, self.document_manager.get_prompt_response(name).response or "")
+                            progressed = True
+                            continue
+
+                        future = executor.submit(self._run_node, name, client, user_prompt, system_prompt)
+                        running[future] = name, client.model
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, model = running.pop(future)
+                    try:
+                        response, elapsed = future.result()
+                    except Exception as e:
+                        logger.error(f"Prompt '{name}' raised an error: {e}")
+                        response, elapsed = None, 0.0
+                    result.timings[name] = elapsed
+
+                    if response is None:
+                        result.failed.append(name)
+                        self._skip_dependents(graph, name, remaining, result)
+                        continue
+
+                    result.responses[name] = response
+                    resolve(name, response.response or "")
+                    self._store(name, response, model)
+                submit_ready()
+
+        result.elapsed = time.perf_counter() - start
+        if self.document_manager is not None and not self.save_after_each and result.responses:
+            self.document_manager.save_to_file()
+
+        logger.info(f"✅ Pipeline finished in {result.elapsed:.2f}s "
+                    f"(sum of steps {sum(result.timings.values()):.2f}s): "
+                    f"{len(result.responses)} ran, {len(result.fresh)} up to date, "
+                    f"{len(result.failed)} failed, {len(result.skipped)} skipped")
+        return result
+
+    def _prepare(self, template: PromptTemplate, values: Dict[str, str | Path],
+                 outputs: Dict[str, str]) -> tuple[OpenAITextPrompt, str, str]:
+        client = self.client_factory()
+        client.attributes = copy.deepcopy(template.default_attributes)
+        node_outputs = {k: outputs[k] for k in template.get_output_placeholders() if k in outputs}
+        user_prompt = template.get_formatted_prompt(values, outputs=node_outputs)
+
+        system_prompt = DEFAULT_PROMPT_SYSTEM
+        if template.prompt_system_use or template.custom_system_prompt_name:
+            system_prompt = self.library.resolve_system_prompt(template)
+        return client, user_prompt, system_prompt
+
+    def _is_fresh(self, name: str, client: OpenAITextPrompt, user_prompt: str, system_prompt: str) -> bool:
+        doc = self.document_manager
+        if not doc.has_document(name):
+            logger.debug(f"Prompt '{name}' is stale: no stored section.")
+            return False
+        header = doc.document_header
+        # Section hashes use the header's system prompt, so the node's own one is compared separately
+        stored_system_prompt = doc.get_prompt_response(name).system_prompt or header.system_prompt
+        if stored_system_prompt != system_prompt:
+            logger.debug(f"Prompt '{name}' is stale: system prompt changed.")
+            return False
+        payload = client.get_structured_payload_for_hash(
+            header.document_id, user_prompt, header.system_prompt, user_prompt_type=name)
+        if not doc.matches_hash(name, client.get_hash(payload)):
+            logger.debug(f"Prompt '{name}' is stale: request hash changed.")
+            return False
+        return True
+
+    def _run_node(self, name: str, client: OpenAITextPrompt, user_prompt: str,
+                  system_prompt: str) -> tuple[Optional[PromptResponse], float]:
+        start = time.perf_counter()
+        response = client.prompt(user_prompt, system_prompt=system_prompt)
+
+        elapsed = time.perf_counter() - start
+        logger.debug(f"Prompt '{name}' finished in {elapsed:.2f}s")
+        return response, elapsed
+
+    def _store(self, name: str, response: PromptResponse, model: str):
+        if self.document_manager is None:
+            return
+        # The section records the requested model, not the dated id the API answers with, so its hash
+        # matches the next request for the same node
+        section = dataclasses.replace(response, model=model) if response.model != model else response
+        with self._doc_lock:
+            self.document_manager.add_prompt_response(name, section)
+            if self.save_after_each:
+                self.document_manager.save_to_file()
+
+    @staticmethod
+    def _skip_dependents(graph: PromptGraph, name: str, remaining: Dict[str, Set[str]], result: PipelineResult):
+        pending = list(graph.dependents.get(name, ()))
+        while pending:
+            child = pending.pop()
+            if child in remaining:
+                del remaining[child]
+                result.skipped.append(child)
+                logger.warning(f"Skipping prompt '{child}': upstream '{name}' failed.")
+                pending.extend(graph.dependents.get(child, ()))
@@ -0,0 +1,169 @@
+# prompt_preflight.py
+"""
+Pre-flight check that a request fits the model's context before it is sent.
+
+Includes:
+- `OVERFLOW_ACTIONS`: "trim" (drop the oldest turns, then cut the last message) or "reject".
+- `ContextOverflowError`: Raised when the messages cannot be made to fit.
+- `PreflightResult`: Prompt tokens, context size, the clamped `max_completion_tokens` and what was trimmed.
+- `ContextPreflight`: Counts message tokens locally, looks the model's `availableContextTokens` up in the
+  cached `VeniceModels` catalog (or a limits dict), trims or rejects, and clamps `max_completion_tokens` to the
+  space that is left.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .utils.tokens_char import get_encoding, truncate_to_tokens
+
+OVERFLOW_ACTIONS = ("trim", "reject")
+
+# Chat formatting overhead: tokens per message and for priming the reply (OpenAI cookbook estimate)
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+
+class ContextOverflowError(ValueError):
+    def __init__(self, message: str, prompt_tokens: int, context_tokens: int):
+        super().__init__(message)
+        self.prompt_tokens = prompt_tokens
+        self.context_tokens = context_tokens
+
+
+@dataclass
+class PreflightResult:
+    model: str
+    prompt_tokens: int
+    context_tokens: Optional[int]
+    max_completion_tokens: Optional[int]
+    requested_completion_tokens: Optional[int] = None
+    dropped_messages: int = 0
+    truncated_tokens: int = 0
+
+    @property
+    def clamped(self) -> bool:
+        return self.max_completion_tokens != self.requested_completion_tokens
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.dropped_messages or self.truncated_tokens)
+
+
+class ContextPreflight:
+    def __init__(self, models=None, limits: Optional[Dict[str, int]] = None, on_overflow: str = "trim",
+                 min_completion_tokens: int = 256, safety_margin: float = 0.05,
+                 tokenizer_model: str = "gpt-3.5-turbo"):
+        """
+        :param models: `VeniceModels` catalog (e.g. `VeniceModels.cached(api_key)`) giving each model's
+            `availableContextTokens`.
+        :param limits: Context sizes by model name; take precedence over the catalog (e.g. for OpenAI).
+        :param on_overflow: One of OVERFLOW_ACTIONS.
+        :param min_completion_tokens: Room that must remain for the reply; less counts as an overflow.
+        :param safety_margin: Fraction of the context held back because the model's tokenizer may count
+            differently from tiktoken.
+        :param tokenizer_model: Model whose tiktoken encoding counts the prompt.
+        """
+        if on_overflow not in OVERFLOW_ACTIONS:
+            raise ValueError(f"Unknown overflow action '{on_overflow}'. Use one of {OVERFLOW_ACTIONS}")
+        self.models = models
+        self.limits = limits or {}
+        self.on_overflow = on_overflow
+        self.min_completion_tokens = min_completion_tokens
+        self.safety_margin = safety_margin
+        self.tokenizer_model = tokenizer_model
+
+    def context_tokens(self, model: str) -> Optional[int]:
+        """The model's context size, or None when it is unknown."""
+        if model in self.limits:
+            return self.limits[model]
+        if self.models is None:
+            return None
+        tokens = self.models.get_tokens_by_model_name(model)
+        return tokens if isinstance(tokens, int) else None
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        encoding = get_encoding(self.tokenizer_model)
+        # encode_ordinary: special-token text such as "<|endoftext|>" in a prompt is counted, not rejected
+        return REPLY_PRIMING_TOKENS + sum(
+            MESSAGE_OVERHEAD_TOKENS
+            + len(encoding.encode_ordinary(m["content"] if isinstance(m.get("content"), str) else ""))
+            + (len(encoding.encode_ordinary(json.dumps(m["tool_calls"]))) if m.get("tool_calls") else 0)
+            for m in messages
+        )
+
+    def check(self, model: str, messages: List[Dict[str, Any]],
+              max_completion_tokens: Optional[int] = None) -> Tuple[List[Dict[str, Any]], PreflightResult]:
+        """
+        Fit `messages` to `model`.
+
+        :return: (messages to send, result); the result's `max_completion_tokens` is the clamped value.
+        :raises ContextOverflowError: With "reject", or when even the last message alone does not fit.
+        """
+        prompt_tokens = self.count_messages(messages)
+        context = self.context_tokens(model)
+        result = PreflightResult(model, prompt_tokens, context, max_completion_tokens, max_completion_tokens)
+        if context is None:
+            logger.debug(f"No context size known for model '{model}'; sending unchecked")
+            return messages, result
+
+        usable = int(context * (1 - self.safety_margin))
+        needed = min(max_completion_tokens or self.min_completion_tokens, self.min_completion_tokens)
+        if prompt_tokens + needed > usable:
+            if self.on_overflow == "reject":
+                raise ContextOverflowError(
+                    f"Prompt of {prompt_tokens} tokens leaves less than {needed} of {context} context tokens "
+                    f"for model '{model}'", prompt_tokens, context)
+            messages = self._trim(messages, usable - needed, result)
+            result.prompt_tokens = prompt_tokens = self.count_messages(messages)
+            logger.warning(f"⚠️ Trimmed prompt to fit '{model}': dropped {result.dropped_messages} messages, "
+                           f"cut {result.truncated_tokens} tokens; {prompt_tokens} tokens remain")
+
+        room = usable - prompt_tokens
+        if max_completion_tokens is not None and max_completion_tokens > room:
+            result.max_completion_tokens = room
+            logger.info(f"🔧 Clamped max_completion_tokens {max_completion_tokens} → {room} for '{model}'")
+        return messages, result
+
+    # Helper methods
+    def _trim(self, messages: List[Dict[str, Any]], limit: int, result: PreflightResult) -> List[Dict[str, Any]]:
+        """
+        Drop the oldest turns (system prompt and last turn kept), then cut the last message. A tool-call turn
+        (the assistant message and its tool results) is kept or dropped as a whole, and tool results are never cut.
+        """
+        system = [m for m in messages[:1] if m.get("role") == "system"]
+        start = len(messages)
+        if start > len(system):
+            start -= 1
+            while start > len(system) and messages[start].get("role") == "tool":
+                start -= 1
+            if messages[start].get("role") == "tool":
+                start += 1
+        history = messages[len(system):start]
+        last = messages[start:]
+
+        while history and self.count_messages(system + history + last) > limit:
+            history.pop(0)
+            result.dropped_messages += 1
+            # Tool results are invalid without the assistant turn that requested them
+            while history and history[0].get("role") == "tool":
+                history.pop(0)
+                result.dropped_messages += 1
+        trimmed = system + history + last
+
+        over = self.count_messages(trimmed) - limit
+        if over > 0 and len(last) == 1 and last[0].get("role") != "tool" and isinstance(last[0].get("content"), str):
+            content = last[0]["content"]
+            keep = len(get_encoding(self.tokenizer_model).encode_ordinary(content)) - over
+            if keep > 0:
+                trimmed[-1] = {**last[0], "content": truncate_to_tokens(content, keep, self.tokenizer_model)}
+                result.truncated_tokens = over
+                over = 0
+        if over > 0:
+            raise ContextOverflowError(f"Messages do not fit model '{result.model}' even after trimming",
+                                       self.count_messages(trimmed), result.context_tokens)
+        return trimmed
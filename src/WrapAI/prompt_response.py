@@ -17,6 +17,7 @@ class PromptResponse(BaseModel):
     parameters: Optional[Dict[str, Any]] = field(default_factory=dict)
     system_prompt: Optional[str] = None
     user_prompt: Optional[str] = None
+    tool_calls: Optional[List[Dict[str, Any]]] = field(default_factory=list)
     _cached_attrs: Optional[PromptAttributes] = field(default=None, init=False, repr=False)
 
     @property
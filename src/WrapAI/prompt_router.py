@@ -0,0 +1,164 @@
+# prompt_router.py
+"""
+Per-request model selection from the model catalog and observed performance.
+
+Includes:
+- `ROUTING_PREFERENCES`: "fastest" (lowest expected latency: the request's `max_completion_tokens` over the observed
+  throughput, else the observed latency) or "cheapest" (lowest catalog price for the request).
+- `ModelStats`: Observed latency and throughput of one model (exponentially weighted) with success/failure counts.
+- `ModelRouter`: Filters the `VeniceModels` catalog to models that fit the request (context size, required
+  capabilities, online) and ranks them; `set_router()` on the text prompts routes every request through it,
+  falling back to the next eligible model when a request fails.
+"""
+
+import math
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .utils.tokens_char import get_encoding
+
+ROUTING_PREFERENCES = ("fastest", "cheapest")
+
+# Request features and the catalog capability each one needs
+CAPABILITY_RESPONSE_SCHEMA = "supportsResponseSchema"
+CAPABILITY_FUNCTION_CALLING = "supportsFunctionCalling"
+CAPABILITY_WEB_SEARCH = "supportsWebSearch"
+
+
+@dataclass
+class ModelStats:
+    latency: Optional[float] = None      # seconds per request
+    throughput: Optional[float] = None   # completion tokens per second
+    successes: int = 0
+    failures: int = 0
+
+    @property
+    def attempts(self) -> int:
+        return self.successes + self.failures
+
+    def observe(self, latency: float, completion_tokens: Optional[int], alpha: float):
+        self.successes += 1
+        self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        if completion_tokens and latency > 0:
+            rate = completion_tokens / latency
+            self.throughput = rate if self.throughput is None else alpha * rate + (1 - alpha) * self.throughput
+
+
+class ModelRouter:
+    def __init__(self, models, prefer: str = "fastest", candidates: Optional[Sequence[str]] = None,
+                 exclude: Iterable[str] = (), fallbacks: Sequence[str] = (), max_attempts: int = 3,
+                 min_samples: int = 1, alpha: float = 0.3, safety_margin: float = 0.05, tokenizer_model: str = "gpt-3.5-turbo"):
+        """
+        :param models: `VeniceModels` catalog (e.g. `VeniceModels.cached(api_key)`).
+        :param prefer: One of ROUTING_PREFERENCES.
+        :param candidates: Restrict routing to these model ids (in this order for ties); default all text models.
+        :param exclude: Model ids never chosen.
+        :param fallbacks: Models tried, in order, after every eligible model has failed.
+        :param max_attempts: Models tried per request before giving up.
+        :param min_samples: Requests needed before a model is ranked by its own latency; models with fewer
+            are tried first so their latency gets measured.
+        :param alpha: Weight of the newest observation in the latency/throughput averages.
+        :param safety_margin: Fraction of each context held back for tokenizer differences.
+        :param tokenizer_model: Model whose tiktoken encoding estimates the prompt size.
+        """
+        if prefer not in ROUTING_PREFERENCES:
+            raise ValueError(f"Unknown routing preference '{prefer}'. Use one of {ROUTING_PREFERENCES}")
+        self.models = models
+        self.prefer = prefer
+        self.candidates = list(candidates) if candidates else None
+        self.exclude = set(exclude)
+        self.fallbacks = list(fallbacks)
+        self.max_attempts = max_attempts
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.safety_margin = safety_margin
+        self.tokenizer_model = tokenizer_model
+        self.stats: Dict[str, ModelStats] = {}
+
+    # Routing
+    def route(self, messages: List[Dict[str, Any]], max_completion_tokens: Optional[int] = None,
+              requires: Iterable[str] = ()) -> List[str]:
+        """Eligible models for the request, best first, followed by the configured fallbacks."""
+        encoding = get_encoding(self.tokenizer_model)
+        prompt_tokens = sum(len(encoding.encode_ordinary(m["content"])) for m in messages if isinstance(m.get("content"), str))
+        ranked = self.rank(self.eligible(prompt_tokens + (max_completion_tokens or 0), set(requires)),
+                           prompt_tokens, max_completion_tokens)
+        ranked += [model for model in self.fallbacks if model not in ranked]
+        if ranked:
+            logger.debug(f"Routing {prompt_tokens}-token prompt to '{ranked[0]}' ({len(ranked)} candidates)")
+        return ranked
+
+    def eligible(self, needed_tokens: int, requires: Set[str] = frozenset()) -> List[str]:
+        """Online text models whose context holds `needed_tokens` and that have every required capability."""
+        if not self.models.models_data:
+            self.models.fetch_models()
+        details = self.models.get_full_model_detail_dict()
+        names = self.candidates if self.candidates is not None else list(details)
+
+        eligible = []
+        for name in names:
+            spec = details.get(name, {}).get("model_spec", {})
+            context = spec.get("availableContextTokens")
+            if name in self.exclude or name not in details or details[name].get("type", "text") != "text":
+                continue
+            if spec.get("offline") or not isinstance(context, int):
+                continue
+            if context * (1 - self.safety_margin) < needed_tokens:
+                continue
+            capabilities = spec.get("capabilities", {})
+            if all(capabilities.get(capability) for capability in requires):
+                eligible.append(name)
+        return eligible
+
+    def rank(self, names: List[str], prompt_tokens: int = 0, max_completion_tokens: Optional[int] = None) -> List[str]:
+        details = self.models.get_full_model_detail_dict()
+        order = {name: i for i, name in enumerate(names)}
+        price = {name: self._price(details.get(name, {}), prompt_tokens, max_completion_tokens or 0) for name in names}
+
+        if self.prefer == "cheapest":
+            return sorted(names, key=lambda name: (price[name], self._latency(name, max_completion_tokens), order[name]))
+        unmeasured = [name for name in names if self.stats_for(name).attempts < self.min_samples]
+        measured = [name for name in names if name not in unmeasured]
+        unmeasured.sort(key=lambda name: (price[name], order[name]))
+        measured.sort(key=lambda name: (self._latency(name, max_completion_tokens), order[name]))
+        return unmeasured + measured
+
+    # Observations
+    def stats_for(self, model: str) -> ModelStats:
+        return self.stats.setdefault(model, ModelStats())
+
+    def record(self, model: str, latency: float, completion_tokens: Optional[int] = None, success: bool = True):
+        stats = self.stats_for(model)
+        if success:
+            stats.observe(latency, completion_tokens, self.alpha)
+        else:
+            stats.failures += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            model: {"latency": stats.latency, "throughput": stats.throughput,
+                    "successes": stats.successes, "failures": stats.failures}
+            for model, stats in self.stats.items()
+        }
+
+    # Helper methods
+    def _latency(self, name: str, completion_tokens: Optional[int] = None) -> float:
+        """Expected seconds until an answer: the reply size over the observed throughput when both are known."""
+        stats = self.stats_for(name)
+        if stats.latency is None:
+            return math.inf
+        expected = completion_tokens / stats.throughput if completion_tokens and stats.throughput else stats.latency
+        # Each failure counts as one more average request spent before getting an answer
+        return expected * stats.attempts / stats.successes
+
+    @staticmethod
+    def _price(detail: Dict[str, Any], prompt_tokens: int, completion_tokens: int) -> float:
+        pricing = detail.get("model_spec", {}).get("pricing", {})
+        try:
+            return (prompt_tokens * pricing["input"]["usd"] + completion_tokens * pricing["output"]["usd"]) / 1e6
+        except (KeyError, TypeError):
+            return math.inf
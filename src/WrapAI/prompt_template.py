@@ -2,13 +2,15 @@
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from collections import Counter
+from typing import Dict, Optional, Tuple
 import re
 import hashlib
 import logging
 
 from WrapDataclass.core.base import BaseModel
 from .prompt_attributes import PromptAttributes
+from .prompt_budget import PromptBudget, BudgetReport
 from .handlers import FILE_HANDLERS
 
 logger = logging.getLogger(__name__)
@@ -47,15 +49,35 @@ class PromptTemplate(BaseModel):
         }
 
     # Other Get methods
-    def get_formatted_prompt(self, values: Dict[str, str | Path]) -> str:
-        formatted = self.prompt_text
-        missing = []
-
+    def get_formatted_prompt(self, values: Dict[str, str | Path], outputs: Optional[Dict[str, str]] = None) -> str:
+        return self._substitute(self._resolve_placeholders(values, outputs))
+
+    def render_with_budget(self, values: Dict[str, str | Path], budget: PromptBudget,
+                           outputs: Optional[Dict[str, str]] = None) -> Tuple[str, BudgetReport]:
+        """
+        Format the prompt with placeholder values cut to fit `budget`.
+
+        :return: (prompt, report of what each placeholder kept)
+        """
+        contents = self._resolve_placeholders(values, outputs)
+        found = {key: text for key, text in contents.items() if text is not None}
+        occurrences = Counter([*(("text", key) for key in self.get_placeholders()),
+                               *(("file", key) for key in self.get_file_placeholders()),
+                               *(("output", key) for key in self.get_output_placeholders())])
+        fixed_text = re.sub(r'<<\s*[\w.-]+\s*>>|%%\s*.*?\s*%%|@@\s*[\w.-]+\s*@@', '', self.prompt_text)
+
+        fitted, report = budget.fit(fixed_text, found, occurrences)
+        formatted = self._substitute({**contents, **fitted})
+        report.rendered_tokens = budget.count(formatted)
+        return formatted, report
+
+    # Helper methods
+    def _resolve_placeholders(self, values: Dict[str, str | Path],
+                              outputs: Optional[Dict[str, str]] = None) -> Dict[Tuple[str, str], Optional[str]]:
+        """Value of every placeholder keyed by (kind, name); None when no value was given."""
+        contents = {}
         for key in self.get_placeholders():
-            if key in values and isinstance(values[key], str):
-                formatted = re.sub(fr'<<\s*{re.escape(key)}\s*>>', values[key], formatted)
-            else:
-                missing.append(f"<< {key} >>")
+            contents[("text", key)] = values[key] if key in values and isinstance(values[key], str) else None
 
         for key in self.get_file_placeholders():
             file_content = None
@@ -76,12 +98,39 @@ class PromptTemplate(BaseModel):
                     file_content = f"[Unsupported file type: {val.suffix}]"
             elif isinstance(val, str):
                 file_content = val
+            contents[("file", key)] = file_content
+
+        if outputs is not None:
+            for key in self.get_output_placeholders():
+                contents[("output", key)] = outputs[key] if key in outputs and isinstance(outputs[key], str) else None
+        return contents
+
+    def _substitute(self, contents: Dict[Tuple[str, str], Optional[str]]) -> str:
+        formatted = self.prompt_text
+        missing = []
+
+        for key in self.get_placeholders():
+            value = contents.get(("text", key))
+            if value is not None:
+                formatted = re.sub(fr'<<\s*{re.escape(key)}\s*>>', value, formatted)
+            else:
+                missing.append(f"<< {key} >>")
 
+        for key in self.get_file_placeholders():
+            file_content = contents.get(("file", key))
             if file_content is not None:
                 formatted = formatted.replace(f"%% {key} %%", file_content)
             else:
                 missing.append(f"%% {key} %%")
 
+        # Outputs go in last so upstream text is never rescanned for << >> or %% %% placeholders
+        for key in [key for key in self.get_output_placeholders() if ("output", key) in contents]:
+            value = contents[("output", key)]
+            if value is not None:
+                formatted = re.sub(fr'@@\s*{re.escape(key)}\s*@@', lambda _m, v=value: v, formatted)
+            else:
+                missing.append(f"@@ {key} @@")
+
         if missing:
             logger.warning(f"Missing placeholders: {missing}")
         return formatted
@@ -5,16 +5,26 @@ import logging
 logger = logging.getLogger(__name__)
 
 CHAT_COMPLETION = "/chat/completions"
+REQUEST_TIMEOUT = 300
+# System prompt sent when the caller gives none
+DEFAULT_PROMPT_SYSTEM = "You are a helpful assistant."
 
 import json
+import time
 import logging
 import hashlib
 import requests
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable, Iterator, Set
 
 from .prompt_attributes import OpenAIPromptAttributes, VenicePromptAttributes, VeniceParameters
+from .prompt_compression import PromptCompressor, CompressionReport
+from .prompt_preflight import ContextPreflight, ContextOverflowError, PreflightResult
+from .prompt_breaker import CircuitBreakerRegistry, CircuitOpenError
+from .prompt_router import ModelRouter, CAPABILITY_RESPONSE_SCHEMA, CAPABILITY_FUNCTION_CALLING, CAPABILITY_WEB_SEARCH
+from .info.models import VeniceModels
 from .prompt_response import PromptResponse
+from .schema_stream import StreamingSchemaValidator, SchemaViolation
 from .utils.markdown import MarkdownToText
 from .wv_core import BASE_URL
 
@@ -30,8 +40,22 @@ class OpenAITextPrompt:
         }
         self.attributes = OpenAIPromptAttributes()
         self.parsed_response: Optional[PromptResponse] = None
+        self.parsed_choices: List[PromptResponse] = []
+        self.last_response_json: Optional[dict] = None
         self.last_user_prompt: str = ""
         self.last_system_prompt: str = ""
+        self.last_stream_status: str = ""
+        self.compressor: Optional[PromptCompressor] = None
+        self.last_compression: Optional[CompressionReport] = None
+        self.preflight: Optional[ContextPreflight] = None
+        self.last_preflight: Optional[PreflightResult] = None
+        self.router: Optional[ModelRouter] = None
+        self.last_routed_model: Optional[str] = None
+        self._routing = False
+        # Set by _post once a request actually went out, so routing does not blame models for local refusals
+        self._request_sent = False
+        self.breakers: Optional[CircuitBreakerRegistry] = None
+        self.timeout: float = REQUEST_TIMEOUT
 
     def set_attributes(self, **kwargs):
         """Dynamically assign attributes."""
@@ -41,7 +65,11 @@ class OpenAITextPrompt:
             else:
                 logger.warning(f"Unknown attribute '{key}' ignored.")
 
-    def prompt(self, user_prompt: str, system_prompt: str = "You are a helpful assistant.", messages=None) -> Optional[PromptResponse]:
+    def prompt(self, user_prompt: str, system_prompt: str = DEFAULT_PROMPT_SYSTEM, messages=None) -> Optional[PromptResponse]:
+        if self.router is not None and not self._routing:
+            return self._routed(lambda: self.prompt(user_prompt, system_prompt, messages),
+                                user_prompt, system_prompt, messages)
+
         self.last_user_prompt = user_prompt
         self.last_system_prompt = system_prompt
 
@@ -51,19 +79,14 @@ class OpenAITextPrompt:
                 {"role": "user", "content": user_prompt}
             ]
 
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            **self.attributes.to_dict(skip_none=True)
-        }
+        try:
+            payload = self._build_payload(messages)
+        except ContextOverflowError as e:
+            logger.error(f"⚠️ Request not sent: {e}")
+            return None
 
         try:
-            response = requests.post(
-                f"{self.base_url}{CHAT_COMPLETION}",
-                headers=self.headers,
-                json=payload,
-                timeout=300
-            )
+            response = self._post(payload)
             logger.debug(f"API response status: {response.status_code}")
             data = response.json()
 
@@ -71,15 +94,313 @@ class OpenAITextPrompt:
                 logger.error(f"API Error: {data['error']}")
                 return None
 
-            self.parsed_response = self.parse_response(data)
+            self.last_response_json = data
+            self.parsed_choices = self.parse_choices(data)
+            self.parsed_response = self.parsed_choices[0]
             return self.parsed_response
 
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ Request not sent: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            return None
+
+    def set_compressor(self, compressor: Optional[PromptCompressor] = None, **options):
+        """
+        Compress messages before every request with `compressor`, or with a `PromptCompressor` built from
+        `options`; call without arguments to send prompts unchanged. Each request's token counts are kept
+        in `last_compression`.
+        """
+        self.compressor = compressor or (PromptCompressor(**options) if options else None)
+
+    def _compress(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.compressor is None:
+            return messages
+        messages, self.last_compression = self.compressor.compress_messages(messages)
+        report = self.last_compression
+        logger.info(f"🔧 Compressed prompt: {report.original_tokens} → {report.compressed_tokens} tokens "
+                    f"({report.ratio:.0%} saved; {', '.join(report.steps) or 'nothing to compress'})")
+        return messages
+
+    def set_router(self, router: Optional[ModelRouter] = None, **options):
+        """
+        Pick the model for every request with `router`, or with a `ModelRouter` built from `options` over the
+        cached model catalog of this account; call without arguments to always use `model`. The model that
+        answered is kept in `last_routed_model`.
+        """
+        if router is None and options:
+            router = ModelRouter(VeniceModels.cached(self.api_key, self.base_url), **options)
+        self.router = router
+
+    def _routing_requirements(self, response_format: Optional[Dict[str, Any]] = None) -> Set[str]:
+        requires = set()
+        schema = response_format or self.attributes.response_format
+        if schema and schema.get("type") == "json_schema":
+            requires.add(CAPABILITY_RESPONSE_SCHEMA)
+        if self.attributes.tools:
+            requires.add(CAPABILITY_FUNCTION_CALLING)
+        return requires
+
+    def _routed(self, send: Callable[[], Optional[PromptResponse]], user_prompt: str, system_prompt: str,
+                messages=None, response_format: Optional[Dict[str, Any]] = None) -> Optional[PromptResponse]:
+        """Call `send` with each routed model in turn until one answers; `model` is restored afterwards."""
+        if messages is None:
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        candidates = self.router.route(messages, self.attributes.max_completion_tokens,
+                                       self._routing_requirements(response_format))
+        if not candidates:
+            logger.warning(f"⚠️ No routed model fits the request; using '{self.model}'")
+            candidates = [self.model]
+        if self.breakers is not None:
+            skipped = [model for model in candidates if not self.breakers.available(self.base_url, model)]
+            if skipped:
+                logger.info(f"🔄 Skipping models with an open circuit: {', '.join(skipped)}")
+                candidates = [model for model in candidates if model not in skipped]
+                if not candidates:
+                    logger.warning(f"⚠️ Every routed model has an open circuit; trying '{self.model}'")
+                    candidates = [self.model]
+
+        pinned = self.model
+        self._routing = True
+        try:
+            for model in candidates[:self.router.max_attempts]:
+                self.model = model
+                self._request_sent = False
+                start = time.perf_counter()
+                result = send()
+                elapsed = time.perf_counter() - start
+                if self._request_sent:
+                    completion_tokens = (result.usage or {}).get("completion_tokens") if result else None
+                    self.router.record(model, elapsed, completion_tokens, success=result is not None)
+                if result is not None:
+                    self.last_routed_model = model
+                    logger.debug(f"Routed request answered by '{model}' in {elapsed:.2f}s")
+                    return result
+                logger.warning(f"🔄 Request to '{model}' failed; trying the next routed model")
+            return None
+        finally:
+            self.model = pinned
+            self._routing = False
+
+    def set_breakers(self, breakers: Optional[CircuitBreakerRegistry] = None, **settings):
+        """
+        Guard every request with the circuit breaker of its base URL and model from `breakers`, or from a
+        `CircuitBreakerRegistry` built from `settings`; call without arguments to always send. Share one
+        registry between clients (e.g. the workers of a pipeline) so they see the same outages.
+        """
+        if breakers is None and settings:
+            breakers = CircuitBreakerRegistry(**settings)
+        self.breakers = breakers
+
+    def _post(self, payload: Dict[str, Any], **kwargs) -> requests.Response:
+        """
+        POST a chat completion, recording the outcome in the breaker of this endpoint and model.
+
+        :raises CircuitOpenError: When the breaker is open; nothing is sent.
+        """
+        breaker = self.breakers.get(self.base_url, payload["model"]) if self.breakers is not None else None
+        if breaker is not None:
+            breaker.check()
+        self._request_sent = True
+        start = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self.base_url}{CHAT_COMPLETION}",
+                headers=self.headers,
+                json=payload,
+                timeout=self.timeout,
+                **kwargs
+            )
+        except requests.exceptions.RequestException:
+            if breaker is not None:
+                breaker.record(False, time.perf_counter() - start)
+            raise
+        if breaker is not None:
+            # Client errors (bad request, auth) say nothing about the endpoint's health; rate limits do
+            breaker.record(response.status_code < 500 and response.status_code != 429, time.perf_counter() - start)
+        return response
+
+    def set_preflight(self, preflight: Optional[ContextPreflight] = None, **options):
+        """
+        Check every request against the model's context before sending it, with `preflight` or a
+        `ContextPreflight` built from `options` (over the cached model catalog of this account unless `models` or
+        `limits` is given); call without arguments to send requests unchecked. Each request's result is kept in
+        `last_preflight`.
+        """
+        if preflight is None and options:
+            if "models" not in options and not options.get("limits"):
+                options["models"] = VeniceModels.cached(self.api_key, self.base_url)
+            preflight = ContextPreflight(**options)
+        self.preflight = preflight
+
+    def _preflight(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.preflight is None:
+            return payload
+        messages, self.last_preflight = self.preflight.check(self.model, payload["messages"],
+                                                             payload.get("max_completion_tokens"))
+        payload["messages"] = messages
+        if self.last_preflight.max_completion_tokens is not None:
+            payload["max_completion_tokens"] = self.last_preflight.max_completion_tokens
+        return payload
+
+    def _build_payload(self, messages: List[Dict[str, Any]],
+                       response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        messages = self._compress(messages)
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            **self.attributes.to_dict(skip_none=True)
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        return self._preflight(payload)
+
+    def prompt_stream(self, user_prompt: str, system_prompt: str = DEFAULT_PROMPT_SYSTEM, messages=None,
+                      response_format: Optional[Dict[str, Any]] = None,
+                      on_field: Optional[Callable[[str, Any], None]] = None,
+                      stop_when_complete: bool = False) -> Optional[PromptResponse]:
+        """
+        Stream the completion and validate structured output field by field as it arrives.
+
+        :param response_format: Structured-output schema (`SchemaBuilder.build()`); defaults to the one
+            in the attributes. Without a json_schema the text is streamed and returned unvalidated.
+        :param on_field: Called with (name, value) as each top-level field closes.
+        :param stop_when_complete: Close the stream as soon as every required field has arrived instead
+            of waiting for the model to finish.
+        :return: PromptResponse, or None on an API error or a schema violation (the stream is aborted
+            at the offending field). `last_stream_status` records how the stream ended.
+        """
+        if self.router is not None and not self._routing:
+            return self._routed(lambda: self.prompt_stream(user_prompt, system_prompt, messages, response_format,
+                                                           on_field, stop_when_complete),
+                                user_prompt, system_prompt, messages, response_format)
+
+        self.last_user_prompt = user_prompt
+        self.last_system_prompt = system_prompt
+
+        if messages is None:
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+
+        try:
+            payload = self._build_payload(messages, response_format)
+        except ContextOverflowError as e:
+            logger.error(f"⚠️ Request not sent: {e}")
+            self.last_stream_status = "context_overflow"
+            return None
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        schema = payload.get("response_format")
+        validator = StreamingSchemaValidator(schema) if schema and schema.get("type") == "json_schema" else None
+
+        content_parts: List[str] = []
+        reasoning = _ThinkFilter()
+        metadata: Dict[str, Any] = {}
+        self.last_stream_status = "completed"
+
+        try:
+            response = self._post(payload, stream=True)
+            logger.debug(f"API response status: {response.status_code}")
+            if response.status_code != 200:
+                data = response.json()
+                logger.error(f"API Error: {data.get('error', data)}")
+                self.last_stream_status = "error"
+                return None
+
+            with response:
+                for chunk in _iter_sse(response):
+                    for key in ("model", "created", "usage", "venice_parameters"):
+                        if chunk.get(key):
+                            metadata[key] = chunk[key]
+                    choices = chunk.get("choices") or [{}]
+                    text = (choices[0].get("delta") or {}).get("content") or ""
+                    if not text:
+                        continue
+                    content_parts.append(text)
+                    if validator is None:
+                        continue
+
+                    for name, value in validator.feed(reasoning.feed(text)):
+                        logger.debug(f"Streamed field '{name}' validated")
+                        if on_field:
+                            on_field(name, value)
+                    if stop_when_complete and validator.complete and not validator.done:
+                        self.last_stream_status = "stopped_when_complete"
+                        logger.info(f"✅ All required fields received; closing stream early")
+                        break
+
+        except SchemaViolation as e:
+            self.last_stream_status = f"schema_violation: {e}"
+            logger.error(f"⚠️ Aborted stream on schema violation: {e}")
+            return None
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ Request not sent: {e}")
+            self.last_stream_status = "circuit_open"
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
+            self.last_stream_status = "error"
             return None
 
+        content = "".join(content_parts)
+        if validator is not None:
+            if self.last_stream_status == "stopped_when_complete":
+                # Replace the truncated text with the fields that arrived intact
+                content = reasoning.prefix(content) + json.dumps(validator.fields, ensure_ascii=False)
+            try:
+                validator.result()
+            except SchemaViolation as e:
+                self.last_stream_status = f"schema_violation: {e}"
+                logger.error(f"⚠️ Streamed response failed validation: {e}")
+                return None
+
+        self.parsed_response = self.parse_response({**metadata, "choices": [{"message": {"content": content}}]})
+        self.parsed_choices = [self.parsed_response]
+        return self.parsed_response
+
+    def prompt_choices(self, user_prompt: str, system_prompt: str = DEFAULT_PROMPT_SYSTEM, n: int = 2,
+                       messages=None, response_format: Optional[Dict[str, Any]] = None) -> List[PromptResponse]:
+        """
+        Sample `n` candidate answers in one request (the prompt tokens are paid once).
+
+        :param response_format: Structured-output schema (`SchemaBuilder.build()`) for this request; defaults to
+            the one in `attributes`.
+        :return: One PromptResponse per choice, each with its own think/answer split; [] if the request failed.
+            Every choice carries the usage of the whole request.
+        """
+        saved = self.attributes.n, self.attributes.response_format
+        self.attributes.n = n
+        if response_format:
+            self.attributes.response_format = response_format
+        try:
+            response = self.prompt(user_prompt, system_prompt, messages=messages)
+        finally:
+            self.attributes.n, self.attributes.response_format = saved
+        if response is None:
+            return []
+        if len(self.parsed_choices) < n:
+            logger.warning(f"⚠️ Asked for {n} choices, the API returned {len(self.parsed_choices)}")
+        return list(self.parsed_choices)
+
     def parse_response(self, response_json: dict) -> PromptResponse:
-        content = response_json.get('choices', [{}])[0].get('message', {}).get('content', '')
+        return self._parse_choice(response_json, response_json.get('choices', [{}])[0])
+
+    def parse_choices(self, response_json: dict) -> List[PromptResponse]:
+        """Parse every choice of a completion (as requested with `n`), in index order."""
+        choices = sorted(response_json.get('choices') or [{}], key=lambda choice: choice.get('index', 0))
+        return [self._parse_choice(response_json, choice) for choice in choices]
+
+    def _parse_choice(self, response_json: dict, choice: dict) -> PromptResponse:
+        message = choice.get('message') or {}
+        # Content is null when the model only calls tools
+        content = message.get('content') or ''
         think, response = "", ""
 
         if '</think>' in content:
@@ -98,7 +419,8 @@ class OpenAITextPrompt:
             citations=[],  # OpenAI doesn't have citations
             parameters=self.attributes.to_dict(skip_none=True),
             system_prompt=self.last_system_prompt,
-            user_prompt=self.last_user_prompt
+            user_prompt=self.last_user_prompt,
+            tool_calls=message.get('tool_calls') or []
         )
 
     # Accessors
@@ -133,7 +455,7 @@ class OpenAITextPrompt:
     def save_text_response(self, md_file_path: str | Path, output_path: str | Path):
         try:
             md_handler = MarkdownToText(md_file_path)
-            md_handler.save_clean_text(output_path)
+            md_handler.stream_clean_text(output_path)
             logger.info(f"Saved clean text to {output_path}")
         except Exception as e:
             logger.error(f"Error saving clean text: {e}")
@@ -151,7 +473,10 @@ class OpenAITextPrompt:
         }
 
     def get_hash(self, structured_payload: dict) -> str:
-        return hashlib.sha256(json.dumps(structured_payload, sort_keys=True).encode()).hexdigest()
+        # Same canonical form as DocumentManager section hashes so the two can be compared
+        return hashlib.sha256(
+            json.dumps(structured_payload, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
 
 
 class VeniceTextPrompt(OpenAITextPrompt):
@@ -174,8 +499,11 @@ class VeniceTextPrompt(OpenAITextPrompt):
             else:
                 logger.warning(f"Unknown attribute '{key}' ignored.")
 
-    def prompt(self, user_prompt: str, system_prompt: str = "You are a helpful assistant.", messages=None,
+    def prompt(self, user_prompt: str, system_prompt: str = DEFAULT_PROMPT_SYSTEM, messages=None,
                response_format: Optional[Dict[str, Any]] = None) -> Optional[PromptResponse]:
+        if self.router is not None and not self._routing:
+            return self._routed(lambda: self.prompt(user_prompt, system_prompt, messages, response_format),
+                                user_prompt, system_prompt, messages, response_format)
 
         self.last_user_prompt = user_prompt
         self.last_system_prompt = system_prompt
@@ -186,6 +514,45 @@ class VeniceTextPrompt(OpenAITextPrompt):
                 {"role": "user", "content": user_prompt}
             ]
 
+        try:
+            payload = self._build_payload(messages, response_format)
+        except ContextOverflowError as e:
+            logger.error(f"⚠️ Request not sent: {e}")
+            return None
+
+        logger.info(f"Payload\n{payload}")
+
+        try:
+            response = self._post(payload)
+            logger.debug(f"Response:\n {response}")
+            logger.debug(f"API response status: {response.status_code}")
+            data = response.json()
+
+            if "error" in data:
+                logger.error(f"API Error: {data['error']}")
+                return None
+
+            self.last_response_json = data
+            self.parsed_choices = self.parse_choices(data)
+            self.parsed_response = self.parsed_choices[0]
+            return self.parsed_response
+
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ Request not sent: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            return None
+
+    def _routing_requirements(self, response_format: Optional[Dict[str, Any]] = None) -> Set[str]:
+        requires = super()._routing_requirements(response_format)
+        if self.attributes.venice_parameters.enable_web_search == "on":
+            requires.add(CAPABILITY_WEB_SEARCH)
+        return requires
+
+    def _build_payload(self, messages: List[Dict[str, Any]],
+                       response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        messages = self._compress(messages)
         # Create the base payload without venice_parameters
         payload = {
             "model": self.model,
@@ -204,34 +571,13 @@ class VeniceTextPrompt(OpenAITextPrompt):
         # Add response_format at the top level if provided
         if response_format:
             payload["response_format"] = response_format
+        return self._preflight(payload)
 
-        logger.info(f"Payload\n{payload}")
-
-        try:
-            response = requests.post(
-                f"{self.base_url}{CHAT_COMPLETION}",
-                headers=self.headers,
-                json=payload,
-                timeout=300
-            )
-            logger.debug(f"Response:\n {response}")
-            logger.debug(f"API response status: {response.status_code}")
-            data = response.json()
-
-            if "error" in data:
-                logger.error(f"API Error: {data['error']}")
-                return None
-
-            self.parsed_response = self.parse_response(data)
-            return self.parsed_response
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed: {e}")
-            return None
-
-    def parse_response(self, response_json: dict) -> PromptResponse:
+    def _parse_choice(self, response_json: dict, choice: dict) -> PromptResponse:
         # Override to include Venice-specific fields like citations
-        content = response_json.get('choices', [{}])[0].get('message', {}).get('content', '')
+        message = choice.get('message') or {}
+        # Content is null when the model only calls tools
+        content = message.get('content') or ''
         think, response = "", ""
 
         if '</think>' in content:
@@ -250,7 +596,8 @@ class VeniceTextPrompt(OpenAITextPrompt):
             citations=response_json.get("venice_parameters", {}).get("web_search_citations", []),
             parameters=self.attributes.to_dict(skip_none=True),
             system_prompt=self.last_system_prompt,
-            user_prompt=self.last_user_prompt
+            user_prompt=self.last_user_prompt,
+            tool_calls=message.get('tool_calls') or []
         )
 
     def save_all(self, file_path: str | Path):
@@ -261,3 +608,46 @@ class VeniceTextPrompt(OpenAITextPrompt):
         file_path.parent.mkdir(parents=True, exist_ok=True)
         self.parsed_response.to_json(file_path, app_name="VenicePrompt", data_version="1.0")
 
+
+def _iter_sse(response) -> Iterator[dict]:
+    """Yield the JSON payload of each `data:` event in a streamed chat completion."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream event: {data[:80]}")
+
+
+class _ThinkFilter:
+    """Holds back a leading <think>...</think> block so only the answer reaches the JSON parser."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._passthrough = False
+
+    def feed(self, text: str) -> str:
+        if self._passthrough:
+            return text
+        self._buffer += text
+        stripped = self._buffer.lstrip()
+        if len(stripped) < len("<think>") and "<think>".startswith(stripped):
+            return ""
+        if not stripped.startswith("<think>"):
+            self._passthrough = True
+            return self._buffer
+        if "</think>" not in self._buffer:
+            return ""
+        self._passthrough = True
+        return self._buffer.split("</think>", 1)[1]
+
+    @staticmethod
+    def prefix(content: str) -> str:
+        """The reasoning block of `content`, if any, so it can be kept ahead of rebuilt output."""
+        if content.lstrip().startswith("<think>") and "</think>" in content:
+            return content.split("</think>", 1)[0] + "</think>"
+        return ""
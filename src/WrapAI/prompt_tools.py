@@ -0,0 +1,242 @@
+# prompt_tools.py
+"""
+Tool-calling loop: the model asks for function calls, they run locally and their results go back to the model.
+
+Includes:
+- `ToolCallResult`: One executed call with its arguments, output (or error) and latency.
+- `ToolRound`: One model request and the calls it asked for, with the model latency, the wall-clock time of
+  the concurrent calls and the time the same calls would have taken one after another.
+- `ToolRunResult`: Final answer, every round and whether the model finished within `max_rounds`.
+- `ToolRunner`: Registers Python callables (plain or `async def`) as tools, sends their JSON schemas with each
+  request, runs all calls of a round concurrently on a thread pool and feeds the results back as `tool`
+  messages through `ConversationMemory` until the model answers without calling a tool.
+"""
+
+import json
+import time
+import types
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_chat_memory import ConversationMemory
+from .prompt_response import PromptResponse
+
+# JSON schema types of annotated tool parameters; anything else is sent without a type
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+@dataclass
+class ToolCallResult:
+    id: str
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    output: str = ""
+    error: Optional[str] = None
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class ToolRound:
+    index: int
+    model_latency: float = 0.0
+    tools_latency: float = 0.0
+    calls: List[ToolCallResult] = field(default_factory=list)
+
+    @property
+    def sequential_latency(self) -> float:
+        """Time the calls would have taken run one after another."""
+        return sum(call.latency for call in self.calls)
+
+    @property
+    def latency(self) -> float:
+        return self.model_latency + self.tools_latency
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "round": self.index,
+            "model_latency": self.model_latency,
+            "tools_latency": self.tools_latency,
+            "sequential_latency": self.sequential_latency,
+            "calls": [{"name": call.name, "latency": call.latency, "ok": call.ok} for call in self.calls],
+        }
+
+
+@dataclass
+class ToolRunResult:
+    response: Optional[PromptResponse] = None
+    rounds: List[ToolRound] = field(default_factory=list)
+    completed: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return sum(round_.latency for round_ in self.rounds)
+
+    @property
+    def tool_calls(self) -> int:
+        return sum(len(round_.calls) for round_ in self.rounds)
+
+    def get_response(self) -> str:
+        return self.response.response if self.response else ""
+
+
+class ToolRunner:
+    def __init__(self, client, memory: Optional[ConversationMemory] = None, max_rounds: int = 8,
+                 max_workers: int = 8, tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+                 parallel_tool_calls: bool = True):
+        """
+        :param client: `VeniceTextPrompt`/`OpenAITextPrompt` used for the model requests.
+        :param memory: Conversation the turns are added to (e.g. `VeniceChatPrompt.memory`); a new one per
+            `run` when omitted.
+        :param max_rounds: Model requests per run before giving up on a final answer.
+        :param max_workers: Upper bound of tool calls run at the same time.
+        :param tool_choice: Sent as `tool_choice` (e.g. "auto", "required"); the client's value when None.
+        :param parallel_tool_calls: Let the model ask for several calls in one turn.
+        """
+        self.client = client
+        self.memory = memory
+        self.max_rounds = max_rounds
+        self.max_workers = max_workers
+        self.tool_choice = tool_choice
+        self.parallel_tool_calls = parallel_tool_calls
+        self.functions: Dict[str, Callable[..., Any]] = {}
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+
+    # Registration
+    def register(self, func: Optional[Callable[..., Any]] = None, *, name: Optional[str] = None,
+                 description: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None):
+        """
+        Register `func` as a tool; usable as a plain call or as a decorator (`@runner.register`).
+
+        :param name: Tool name seen by the model; defaults to the function name.
+        :param description: Defaults to the first paragraph of the docstring.
+        :param parameters: JSON schema of the arguments; derived from the signature and type hints when omitted.
+        """
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            tool_name = name or function.__name__
+            doc = inspect.getdoc(function) or ""
+            self.functions[tool_name] = function
+            self.schemas[tool_name] = {
+                "type": "function",
+                "function": {
+                    "name": tool_name,
+                    "description": description or doc.split("\n\n")[0].replace("\n", " "),
+                    "parameters": parameters or self._parameters_schema(function),
+                },
+            }
+            logger.debug(f"Registered tool '{tool_name}'")
+            return function
+
+        return decorator(func) if func is not None else decorator
+
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        """The `tools` request field for every registered function."""
+        return list(self.schemas.values())
+
+    # Run methods
+    def run(self, user_prompt: str, system_prompt: str = "You are a helpful assistant.") -> ToolRunResult:
+        """
+        Ask `user_prompt` and execute the model's tool calls until it answers without one.
+
+        :return: ToolRunResult; `response` is None when a request failed, and `completed` is False when the
+            model was still calling tools after `max_rounds` requests.
+        """
+        memory = self.memory if self.memory is not None else ConversationMemory(system_prompt)
+        memory.add_message("user", user_prompt)
+        result = ToolRunResult()
+
+        attributes = self.client.attributes
+        saved = attributes.tools, attributes.tool_choice, attributes.parallel_tool_calls
+        attributes.tools = self.tools
+        attributes.tool_choice = self.tool_choice if self.tool_choice is not None else saved[1]
+        attributes.parallel_tool_calls = self.parallel_tool_calls
+        try:
+            for index in range(1, self.max_rounds + 1):
+                round_ = ToolRound(index)
+                start = time.perf_counter()
+                response = self.client.prompt(user_prompt, system_prompt, messages=memory.message_history)
+                round_.model_latency = time.perf_counter() - start
+                result.rounds.append(round_)
+                if response is None:
+                    logger.error(f"⚠️ Tool loop stopped: request {index} failed")
+                    return result
+                result.response = response
+
+                if not response.tool_calls:
+                    memory.add_message("assistant", response.response)
+                    result.completed = True
+                    logger.info(f"✅ Tool loop finished after {index} rounds, {result.tool_calls} calls, "
+                                f"{result.elapsed:.2f}s")
+                    return result
+
+                memory.add_tool_calls(response.tool_calls, response.response)
+                start = time.perf_counter()
+                round_.calls = self.execute(response.tool_calls)
+                round_.tools_latency = time.perf_counter() - start
+                for call in round_.calls:
+                    memory.add_tool_result(call.id, call.output, call.name)
+                logger.info(f"🔧 Round {index}: model {round_.model_latency:.2f}s, {len(round_.calls)} tool calls "
+                            f"{round_.tools_latency:.2f}s (sequential {round_.sequential_latency:.2f}s)")
+        finally:
+            attributes.tools, attributes.tool_choice, attributes.parallel_tool_calls = saved
+
+        logger.warning(f"⚠️ Model still calling tools after {self.max_rounds} rounds")
+        return result
+
+    def execute(self, tool_calls: List[Dict[str, Any]]) -> List[ToolCallResult]:
+        """Run the calls of one model turn concurrently; results are in call order."""
+        if len(tool_calls) <= 1 or self.max_workers <= 1:
+            return [self._call(tool_call) for tool_call in tool_calls]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tool_calls))) as executor:
+            return list(executor.map(self._call, tool_calls))
+
+    # Helper methods
+    def _call(self, tool_call: Dict[str, Any]) -> ToolCallResult:
+        function = tool_call.get("function") or {}
+        call = ToolCallResult(id=tool_call.get("id", ""), name=function.get("name", ""))
+        start = time.perf_counter()
+        try:
+            if call.name not in self.functions:
+                raise LookupError(f"Unknown tool '{call.name}'")
+            arguments = json.loads(function.get("arguments") or "{}")
+            if not isinstance(arguments, dict):
+                raise ValueError("Tool arguments must be a JSON object")
+            call.arguments = arguments
+            output = self.functions[call.name](**arguments)
+            if inspect.isawaitable(output):
+                output = asyncio.run(output)
+            call.output = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False, default=str)
+        except Exception as e:
+            # The model sees the error and can correct its arguments in the next round
+            call.error = f"{type(e).__name__}: {e}"
+            call.output = json.dumps({"error": call.error})
+            logger.warning(f"⚠️ Tool '{call.name}' failed: {call.error}")
+        call.latency = time.perf_counter() - start
+        return call
+
+    @staticmethod
+    def _parameters_schema(function: Callable[..., Any]) -> Dict[str, Any]:
+        properties, required = {}, []
+        for param in inspect.signature(function).parameters.values():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            annotation = param.annotation
+            if get_origin(annotation) in (Union, types.UnionType):
+                # Optional[X] is sent as X
+                annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), annotation)
+            json_type = JSON_TYPES.get(get_origin(annotation) or annotation)
+            properties[param.name] = {"type": json_type} if json_type else {}
+            if param.default is param.empty:
+                required.append(param.name)
+        return {"type": "object", "properties": properties, "required": required}
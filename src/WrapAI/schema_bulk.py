@@ -0,0 +1,213 @@
+# schema_bulk.py
+"""
+Bulk validation of JSONL structured responses into columnar output.
+
+Includes:
+- `Column`: Arrow-style column (typed values buffer + validity mask) for one `SchemaField`.
+- `RowError`: Line number and message for a row that failed to decode or validate.
+- `BulkValidationResult`: Columns keyed by `SchemaField.name`, source line of each valid row,
+  and the per-row error report.
+- `validate_jsonl`: Streams a JSONL file in byte ranges, validates each row with the compiled
+  schema and builds typed columns, optionally across a process pool.
+"""
+
+import os
+import json
+import logging
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .schema_validator import compile_schema
+
+# Fixed-width buffers for scalar types; everything else is kept as a Python list
+_TYPECODES = {"integer": "q", "number": "d", "boolean": "b"}
+_DEFAULTS = {"q": 0, "d": 0.0, "b": 0}
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    values: Union[array, List[Any]]
+    validity: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def extend(self, other: "Column"):
+        self.values.extend(other.values)
+        self.validity.extend(other.validity)
+
+    def to_list(self) -> List[Any]:
+        """Values with None for missing entries."""
+        values = self.values.tolist() if isinstance(self.values, array) else self.values
+        if self.type == "boolean":
+            values = [bool(v) for v in values]
+        return [v if ok else None for v, ok in zip(values, self.validity)]
+
+    def to_numpy(self):
+        """Return (values, mask) NumPy arrays; mask is True where a value is present."""
+        import numpy as np
+
+        if isinstance(self.values, array):
+            values = np.frombuffer(self.values, dtype={"q": np.int64, "d": np.float64, "b": np.int8}[self.values.typecode])
+            if self.type == "boolean":
+                values = values.astype(bool)
+        else:
+            values = np.empty(len(self.values), dtype=object)
+            values[:] = self.values
+        return values, np.frombuffer(bytes(self.validity), dtype=np.uint8).astype(bool)
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        values, mask = self.to_numpy()
+        return pa.array(values, mask=~mask, from_pandas=False)
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class BulkValidationResult:
+    columns: Dict[str, Column] = field(default_factory=dict)
+    row_lines: array = field(default_factory=lambda: array("q"))
+    errors: List[RowError] = field(default_factory=list)
+    total_rows: int = 0
+
+    @property
+    def valid_rows(self) -> int:
+        return len(self.row_lines)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        return {name: column.to_numpy()[0] for name, column in self.columns.items()}
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        return pa.table({name: column.to_arrow() for name, column in self.columns.items()})
+
+
+def validate_jsonl(file_path: Union[str, Path], schema_json: dict, processes: Optional[int] = None,
+                   chunk_bytes: int = 8 * 1024 * 1024, include_missing_optionals: bool = True) -> BulkValidationResult:
+    """
+    Validate every line of a JSONL file against `schema_json` and collect the valid rows as columns.
+
+    :param processes: Worker processes; None uses os.cpu_count(), 0 or 1 runs in this process.
+    :param chunk_bytes: Approximate size of the byte range handed to each task.
+    :param include_missing_optionals: Keep optional fields as columns with invalid (masked) entries
+        when absent; otherwise only required fields become columns.
+    :return: BulkValidationResult with line numbers (1-based) for valid rows and errors.
+    """
+    path = Path(file_path)
+    ranges = _split_ranges(path, chunk_bytes)
+    tasks = [(str(path), start, end, schema_json, include_missing_optionals) for start, end in ranges]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as executor:
+            chunks = list(executor.map(_validate_range, tasks))
+    else:
+        chunks = [_validate_range(task) for task in tasks]
+
+    result = BulkValidationResult()
+    line_offset = 0
+    for columns, row_lines, errors, line_count in chunks:
+        for name, column in columns.items():
+            if name in result.columns:
+                result.columns[name].extend(column)
+            else:
+                result.columns[name] = column
+        result.row_lines.extend(line + line_offset for line in row_lines)
+        result.errors.extend(RowError(line + line_offset, message) for line, message in errors)
+        line_offset += line_count
+    result.total_rows = line_offset
+
+    logger.info(f"✅ Validated {result.total_rows} rows from {path}: "
+                f"{result.valid_rows} valid, {len(result.errors)} errors")
+    return result
+
+
+def _split_ranges(path: Path, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split the file into byte ranges that end on newline boundaries."""
+    size = path.stat().st_size
+    ranges = []
+    start = 0
+    with path.open("rb") as f:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _validate_range(task) -> Tuple[Dict[str, Column], array, List[Tuple[int, str]], int]:
+    file_path, start, end, schema_json, include_missing_optionals = task
+    compiled = compile_schema(schema_json)
+    fields = [f for f in compiled.fields if f.required or include_missing_optionals]
+
+    columns = {}
+    for schema_field in fields:
+        typecode = _TYPECODES.get(schema_field.type)
+        values = array(typecode) if typecode else []
+        columns[schema_field.name] = Column(schema_field.name, schema_field.type, values)
+    appenders = [(columns[f.name].values.append, columns[f.name].validity.append, f.name,
+                  _DEFAULTS.get(_TYPECODES.get(f.type))) for f in fields]
+
+    row_lines = array("q")
+    errors: List[Tuple[int, str]] = []
+    line_count = 0
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            raw = f.readline()
+            if not raw:
+                break
+            position += len(raw)
+            line_count += 1
+            if not raw.strip():
+                continue
+
+            try:
+                row = json.loads(raw)
+                compiled.validate(row)
+            except ValueError as e:
+                errors.append((line_count, str(e)))
+                continue
+
+            appended = 0
+            try:
+                for append_value, append_valid, name, default in appenders:
+                    value = row.get(name)
+                    if value is None:
+                        append_value(default)
+                        append_valid(0)
+                    else:
+                        append_value(value)
+                        append_valid(1)
+                    appended += 1
+            except OverflowError as e:
+                # Keep columns aligned: undo the fields already appended for this row
+                for column in list(columns.values())[:appended]:
+                    column.values.pop()
+                    column.validity.pop()
+                errors.append((line_count, f"Value out of range: {e}"))
+                continue
+            row_lines.append(line_count)
+
+    return columns, row_lines, errors, line_count
@@ -0,0 +1,170 @@
+# schema_compact.py
+"""
+Compact encoding of structured-output schemas to cut `response_format` prompt tokens.
+
+Includes:
+- `DESCRIPTION_POLICIES`: "keep", "shorten" (first sentence, capped length) or "strip".
+- `TokenSavings`: Token counts of the original and compact schema as sent in the request.
+- `CompactSchema`: The compacted schema plus the alias map; `expand()` renames a response back to the
+  original property names (also applied by `parse_response_with_schema`).
+- `compact_schema`: Aliases long property names (nested objects and array items included) and applies a
+  description policy to a `SchemaBuilder.build()` result.
+"""
+
+import re
+import json
+import copy
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .utils.tokens_char import count_characters_and_tokens
+
+DESCRIPTION_POLICIES = ("keep", "shorten", "strip")
+
+# alias -> (original name, alias map of the nested object or array item, if any)
+AliasMap = Dict[str, Tuple[str, Optional["AliasMap"]]]
+
+
+@dataclass
+class TokenSavings:
+    original_tokens: int
+    compact_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compact_tokens
+
+    @property
+    def ratio(self) -> float:
+        return self.saved_tokens / self.original_tokens if self.original_tokens else 0.0
+
+
+@dataclass
+class CompactSchema:
+    schema_json: Dict[str, Any]
+    original: Dict[str, Any]
+    aliases: AliasMap = field(default_factory=dict)
+    model: str = "gpt-3.5-turbo"
+    _savings: Optional[TokenSavings] = field(default=None, repr=False)
+
+    def expand(self, data: Any) -> Any:
+        """Rename aliased keys in a decoded response back to the original property names."""
+        return _expand(data, self.aliases) if self.aliases else data
+
+    @property
+    def token_savings(self) -> TokenSavings:
+        """Tokens of each schema serialized the way `requests` sends the payload, counted with tiktoken."""
+        if self._savings is None:
+            _, original = count_characters_and_tokens(json.dumps(self.original), self.model)
+            _, compact = count_characters_and_tokens(json.dumps(self.schema_json), self.model)
+            self._savings = TokenSavings(original, compact)
+        return self._savings
+
+
+def compact_schema(schema_json: Dict[str, Any], descriptions: str = "shorten", alias_keys: bool = True,
+                   min_alias_length: int = 6, max_description_length: int = 60,
+                   model: str = "gpt-3.5-turbo") -> CompactSchema:
+    """
+    Build a compact copy of `schema_json`.
+
+    :param descriptions: One of DESCRIPTION_POLICIES.
+    :param alias_keys: Replace property names of at least `min_alias_length` characters with short aliases
+        built from their word initials (e.g. "publication_date" -> "pd").
+    :param max_description_length: Upper bound for "shorten"; cut on a word boundary.
+    :param model: Model whose tokenizer is used for `token_savings`.
+    """
+    if descriptions not in DESCRIPTION_POLICIES:
+        raise ValueError(f"Unknown description policy '{descriptions}'. Use one of {DESCRIPTION_POLICIES}")
+
+    compact = copy.deepcopy(schema_json)
+    schema = compact["json_schema"]["schema"]
+    options = (descriptions, alias_keys, min_alias_length, max_description_length)
+    aliases = _compact_object(schema, options) or {}
+    _apply_description_policy(compact["json_schema"], descriptions, max_description_length)
+
+    result = CompactSchema(compact, schema_json, aliases, model)
+    logger.debug(f"Compacted schema '{compact['json_schema'].get('name')}': {len(aliases)} top-level aliases")
+    return result
+
+
+def _compact_object(schema: Dict[str, Any], options) -> Optional[AliasMap]:
+    """Compact an object schema in place; return its alias map (None when nothing was renamed)."""
+    descriptions, alias_keys, min_alias_length, max_description_length = options
+    _apply_description_policy(schema, descriptions, max_description_length)
+
+    properties = schema.get("properties")
+    if not isinstance(properties, dict):
+        return None
+
+    aliases: AliasMap = {}
+    renamed = {}
+    taken = set()
+    for name, prop in properties.items():
+        child_map = _compact_property(prop, options)
+        alias = name
+        if alias_keys and len(name) >= min_alias_length:
+            alias = _make_alias(name, taken | set(properties) - {name})
+        taken.add(alias)
+        renamed[alias] = prop
+        if alias != name or child_map:
+            aliases[alias] = (name, child_map)
+
+    schema["properties"] = renamed
+    if "required" in schema:
+        to_alias = {original: alias for alias, (original, _) in aliases.items()}
+        schema["required"] = [to_alias.get(name, name) for name in schema["required"]]
+    return aliases or None
+
+
+def _compact_property(prop: Dict[str, Any], options) -> Optional[AliasMap]:
+    if prop.get("type") == "array" and isinstance(prop.get("items"), dict):
+        _apply_description_policy(prop, options[0], options[3])
+        return _compact_property(prop["items"], options)
+    if prop.get("type") == "object" or "properties" in prop:
+        return _compact_object(prop, options)
+    _apply_description_policy(prop, options[0], options[3])
+    return None
+
+
+def _apply_description_policy(node: Dict[str, Any], policy: str, max_length: int):
+    description = node.get("description")
+    if description is None or policy == "keep":
+        return
+    if policy == "strip":
+        del node["description"]
+        return
+
+    short = re.split(r"(?<=[.!?])\s", description.strip(), maxsplit=1)[0]
+    if len(short) > max_length:
+        short = short[:max_length].rsplit(" ", 1)[0]
+    node["description"] = short.rstrip(" ,;:")
+
+
+def _make_alias(name: str, taken: set) -> str:
+    words = [w for w in re.split(r"[_\-\s]+|(?<=[a-z0-9])(?=[A-Z])", name) if w]
+    alias = "".join(w[0] for w in words).lower() if len(words) > 1 else name[:3].lower()
+    candidate, n = alias, 2
+    while candidate in taken:
+        candidate = f"{alias}{n}"
+        n += 1
+    return candidate
+
+
+def _expand(data: Any, aliases: AliasMap) -> Any:
+    if isinstance(data, list):
+        return [_expand(item, aliases) for item in data]
+    if not isinstance(data, dict):
+        return data
+    expanded = {}
+    for key, value in data.items():
+        entry = aliases.get(key)
+        if entry is None:
+            expanded[key] = value
+            continue
+        original, child_map = entry
+        expanded[original] = _expand(value, child_map) if child_map else value
+    return expanded
@@ -1,13 +1,20 @@
 # schema_document
 
+from collections.abc import MutableMapping
 from dataclasses import dataclass
-from typing import Dict, Any, Union, Optional
+from typing import Dict, Any, Union, Optional, Iterator
+import os
 import json
+import mmap
 from pathlib import Path
 import logging
 import hashlib
 
 from .prompt_response import PromptResponse
+from .schema_document_index import DocumentIndex
+from .schema_document_storage import DocumentStorage, get_storage, detect_storage
+from .utils.json import JsonOffsetScanner
+from .utils.file_lock import FileLock
 
 # Logger Configuration
 logger = logging.getLogger(__name__)
@@ -37,37 +44,185 @@ class DocumentHeader:
             system_prompt=data["payload"].get("system_prompt", ""))
 
 
+@dataclass(frozen=True)
+class _SectionSpan:
+    """Byte spans of one section's payload and response entries in a memory-mapped document."""
+    payload: tuple[int, int]
+    response: Optional[tuple[int, int]]
+
+
+class _LazySectionMap(MutableMapping):
+    """
+    Section mapping that holds byte spans until a section is first read, then decodes and keeps
+    the PromptResponse. The mmap is released once every section has been materialized, or by `close()`
+    when the map is replaced before that.
+    """
+
+    def __init__(self, scanner: JsonOffsetScanner, spans: Dict[str, _SectionSpan]):
+        self._scanner = scanner
+        self._entries: Dict[str, Union[PromptResponse, _SectionSpan]] = dict(spans)
+        self._pending = len(spans)
+        if not self._pending:
+            self.close()
+
+    def __getitem__(self, name: str) -> PromptResponse:
+        value = self._entries[name]
+        if isinstance(value, _SectionSpan):
+            payload_item = self._scanner.decode(value.payload)
+            response_item = self._scanner.decode(value.response) if value.response else {}
+            value = DocumentManager._section_from_structured(payload_item, response_item)
+            self._set(name, value)
+        return value
+
+    def __setitem__(self, name: str, value: PromptResponse):
+        self._set(name, value)
+
+    def __delitem__(self, name: str):
+        if isinstance(self._entries.pop(name), _SectionSpan):
+            self._release_one()
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_loaded(self, name: str) -> bool:
+        return not isinstance(self._entries.get(name), _SectionSpan)
+
+    def _set(self, name: str, value: PromptResponse):
+        was_pending = isinstance(self._entries.get(name), _SectionSpan)
+        self._entries[name] = value
+        if was_pending:
+            self._release_one()
+
+    def close(self):
+        """Release the mmap; sections not yet read can no longer be decoded."""
+        if isinstance(self._scanner.buffer, mmap.mmap) and not self._scanner.buffer.closed:
+            self._scanner.buffer.close()
+
+    def _release_one(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self.close()
+
+
 class DocumentManager:
     APP_NAME = "DocumentProcessor"
     DATA_VERSION = "0.1.0"
     FILE_TYPE = "document"
     GENERATOR = "direct"
-
-    def __init__(self, file_path: Union[str, Path]):
+    JOURNAL_SUFFIX = ".journal"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, file_path: Union[str, Path], journal: bool = False, compact_every: int = 100,
+                 index: Optional[DocumentIndex] = None, storage: Union[str, DocumentStorage] = "json",
+                 lock_timeout: Optional[float] = None):
+        """
+        :param journal: Append each header/section change to `<file>.journal` (fsynced) instead of
+            rewriting the whole document on every save. `save_to_file` compacts once `compact_every`
+            records have accumulated; `load_from_file` replays the journal on top of the document.
+        :param index: Cross-document index updated by every successful `save_to_file`.
+        :param storage: Backend used when saving ("json", "json.gz", "json.zst", "msgpack" or a
+            `DocumentStorage`). Loading detects the format of the existing file.
+        :param lock_timeout: Seconds to wait for the `<file>.lock` advisory lock used by `merge_save`,
+            `locked()` and journal writes (None waits indefinitely).
+        """
         self.file_path = Path(file_path)
+        self.storage = get_storage(storage) if isinstance(storage, str) else storage
         self.document_header: Optional[DocumentHeader] = None
         self.documents: Dict[str, PromptResponse] = {}
+        self.journal = journal
+        self.compact_every = compact_every
+        self._journal_records = 0
+        # name -> (section object, hash); reused while the same object is stored under the same header
+        self._hash_cache: Dict[str, tuple[PromptResponse, str]] = {}
+        self._hash_header: Optional[tuple[str, str]] = None
+        # Hashes read from the file by a lazy load, valid for sections not yet materialized
+        self._stored_hashes: Dict[str, str] = {}
+        self._stored_header: Optional[tuple[str, str]] = None
+        self.index = index
+        # Sections changed since the last index update; None means re-index everything
+        self._index_dirty: Optional[set[str]] = None
+        # Changes made in this process since the last load or save, applied by merge_save
+        self._unsaved: set[str] = set()
+        self._header_changed = False
+        self._lock = FileLock(self.file_path.with_name(self.file_path.name + self.LOCK_SUFFIX), timeout=lock_timeout)
+
+    @property
+    def documents(self) -> Dict[str, PromptResponse]:
+        return self._documents
+
+    @documents.setter
+    def documents(self, documents: Dict[str, PromptResponse]):
+        # A lazily loaded map still holds the mmap of the file it was read from
+        previous = self.__dict__.get("_documents")
+        if isinstance(previous, _LazySectionMap) and previous is not documents:
+            previous.close()
+        self._documents = documents
+
+    @property
+    def journal_path(self) -> Path:
+        return self.file_path.with_name(self.file_path.name + self.JOURNAL_SUFFIX)
 
     def create_header(self, document_id: str, system_prompt: str = ""):
         self.document_header = DocumentHeader(document_id=document_id, system_prompt=system_prompt)
+        self._index_dirty = None
+        self._header_changed = True
+        if self.journal:
+            self._append_journal({"op": "header", **self.document_header.to_dict()})
 
     def add_prompt_response(self, name: str, response: PromptResponse):
         self.documents[name] = response
+        self._hash_cache.pop(name, None)
+        self._stored_hashes.pop(name, None)
+        self._unsaved.add(name)
+        if self._index_dirty is not None:
+            self._index_dirty.add(name)
+        if self.journal:
+            payload, response_item = self._section_to_structured(response)
+            self._append_journal({"op": "section", "name": name, "payload": payload, "response": response_item})
 
     def get_prompt_response(self, name: str) -> Optional[PromptResponse]:
         return self.documents.get(name)
 
-    def load_from_file(self) -> bool:
-        if not self.file_path.exists():
+    def load_from_file(self, lazy: bool = False) -> bool:
+        """
+        Load the document (and replay its journal in journal mode).
+
+        :param lazy: Memory-map the file and read only the header, section index and stored hashes.
+            Each PromptResponse is decoded on first access, so load time and memory scale with what is used.
+        """
+        has_journal = self.journal and self.journal_path.exists()
+        if not self.file_path.exists() and not has_journal:
             logger.warning(f"No saved document file found at {self.file_path}.")
             return False
 
         try:
-            with self.file_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            logger.info("🔄 Detected structured document format. Converting...")
-            self.from_structured_dict(data)
+            if self.file_path.exists():
+                backend = detect_storage(self.file_path)
+                if backend is None:
+                    raise ValueError(f"Unrecognised document format in {self.file_path}")
+
+                if lazy and backend.supports_lazy:
+                    self._load_lazy()
+                else:
+                    if lazy:
+                        logger.debug(f"'{backend.name}' storage cannot be loaded lazily, loading fully.")
+                    with self.file_path.open("rb") as f:
+                        data = backend.load(f)
+
+                    logger.info(f"🔄 Detected structured document format ({backend.name}). Converting...")
+                    self.from_structured_dict(data)
+
+            if has_journal:
+                self._replay_journal()
+            self._index_dirty = None
+            self._unsaved.clear()
+            self._header_changed = False
 
             logger.info(f"✅ Loaded document data from {self.file_path}")
             return True
@@ -81,17 +236,181 @@ class DocumentManager:
             logger.warning("⚠️ No document header or details to save. Skipping file write.")
             return False
 
+        if self.journal and self._journal_records < self.compact_every:
+            # Every change is already durable in the journal
+            self._update_index()
+            return True
+
+        if self.journal:
+            # Other writers may have journaled sections this process never loaded; fold them in under the
+            # lock before the journal is truncated
+            return self.merge_save()
+        return self._write_document()
+
+    def merge_save(self) -> bool:
+        """
+        Concurrency-safe save: under the advisory lock, reload the on-disk document, apply only the
+        sections (and header) changed in this process since the last load/save, and write atomically.
+        Sections added by other processes are kept; a section changed by both is taken from this process.
+        """
+        if not self.document_header and not self._unsaved:
+            logger.warning("⚠️ No document header or details to save. Skipping file write.")
+            return False
+
+        try:
+            with self._lock:
+                disk = DocumentManager(self.file_path, journal=self.journal, storage=self.storage)
+                disk._lock = self._lock  # same reentrant lock, already held
+                if self.file_path.exists() or (self.journal and self.journal_path.exists()):
+                    if not disk.load_from_file():
+                        return False
+
+                if disk.document_header and not self._header_changed:
+                    self.document_header = disk.document_header
+                merged = {name: disk.documents[name] for name in disk.documents}
+                for name in self._unsaved:
+                    if name in self.documents:
+                        merged[name] = self.documents[name]
+                local_count, disk_count = len(self._unsaved), len(disk.documents)
+
+                self.documents = merged
+                self._stored_hashes = {}
+                self._index_dirty = None
+                if not self.document_header or not self.documents:
+                    logger.warning("⚠️ No document header or details to save. Skipping file write.")
+                    return False
+                saved = self._write_document()
+        except TimeoutError as err:
+            logger.error(f"Error saving document to {self.file_path}: {err}")
+            return False
+
+        if saved:
+            logger.info(f"🔀 Merged {local_count} local with {disk_count} on-disk sections into {self.file_path}")
+        return saved
+
+    def locked(self) -> FileLock:
+        """Advisory lock on this document, e.g. `with manager.locked(): load, modify, save`."""
+        return self._lock
+
+    def _write_document(self) -> bool:
         try:
             structured = self.to_structured_output()
-            with self.file_path.open("w", encoding="utf-8") as json_file:
-                json.dump(structured, json_file, indent=4, ensure_ascii=False)
+            self._write_atomic(self.file_path, structured)
             logger.info(f"✅ Structured document saved to {self.file_path}")
-            return True
-
         except (IOError, TypeError, Exception) as err:
             logger.error(f"Error saving document to {self.file_path}: {err}")
             return False
 
+        if self.journal:
+            self._truncate_journal()
+        self._unsaved.clear()
+        self._header_changed = False
+        self._update_index()
+        return True
+
+    def _update_index(self):
+        if self.index is None:
+            return
+        try:
+            self.index.update_document(self, sections=self._index_dirty)
+            self._index_dirty = set()
+        except Exception as err:
+            logger.error(f"Error updating document index for {self.file_path}: {err}")
+
+    def compact(self) -> bool:
+        """Fold the journal into the structured document file and truncate the journal."""
+        records = self._journal_records
+        self._journal_records = max(records, self.compact_every)
+        saved = self.save_to_file()
+        if not saved:
+            self._journal_records = records
+        return saved
+
+    def _load_lazy(self):
+        with self.file_path.open("rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        scanner = JsonOffsetScanner(buffer)
+        header_keys = ("document_id", "system_prompt")
+        try:
+            top, _ = scanner.object_spans(scanner.skip_ws(0))
+            payload_spans, _ = scanner.object_spans(top["payload"][0])
+            response_spans = scanner.object_spans(top["response"][0])[0] if "response" in top else {}
+            header = DocumentHeader.from_dict(
+                {key: scanner.decode(payload_spans[key]) for key in header_keys if key in payload_spans})
+            stored_hashes = scanner.decode(top["hashes"]) if "hashes" in top else {}
+        except Exception:
+            buffer.close()
+            raise
+
+        self.document_header = header
+        self.documents = _LazySectionMap(scanner, {
+            name: _SectionSpan(payload=span, response=response_spans.get(name))
+            for name, span in payload_spans.items() if name not in header_keys
+        })
+        self._stored_hashes = stored_hashes
+        self._stored_header = (self.document_header.document_id, self.document_header.system_prompt)
+        logger.info(f"🔄 Indexed {len(self.documents)} sections from {self.file_path} (lazy)")
+
+    # Journal methods
+    def _append_journal(self, record: Dict[str, Any]):
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock, self.journal_path.open("a+b") as f:
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate a record torn by a crash so the new one does not join its line
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_records += 1
+
+    def _replay_journal(self):
+        applied = 0
+        with self.journal_path.open("r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append tears the record it was writing; later appends start a new line
+                    logger.warning(f"Ignoring torn journal record at {self.journal_path}:{line_no}")
+                    continue
+
+                op = record.get("op")
+                if op == "header":
+                    self.document_header = DocumentHeader.from_dict(record)
+                elif op == "section":
+                    self.documents[record["name"]] = self._section_from_structured(
+                        record.get("payload", {}), record.get("response", {}))
+                else:
+                    logger.warning(f"Unknown journal op '{op}' at {self.journal_path}:{line_no}")
+                    continue
+                applied += 1
+
+        self._journal_records = applied
+        logger.info(f"🔄 Replayed {applied} journal records from {self.journal_path}")
+
+    def _truncate_journal(self):
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._journal_records = 0
+
+    def _write_atomic(self, path: Path, data: dict):
+        """Write to a temp file, fsync it and rename over `path` so readers never see a partial file."""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("wb") as out_file:
+                self.storage.dump(data, out_file)
+                out_file.flush()
+                os.fsync(out_file.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "header": self.document_header.to_dict() if self.document_header else {},
@@ -106,7 +425,7 @@ class DocumentManager:
         }
 
     def create_document_header(self, document_id: str, system_prompt: str = ""):
-        self.document_header = DocumentHeader(document_id=document_id, system_prompt=system_prompt)
+        self.create_header(document_id, system_prompt)
 
     def get_document_detail(self, name: str) -> Dict[str, Any]:
         doc = self.documents.get(name)
@@ -134,24 +453,8 @@ class DocumentManager:
         hashes = {}
 
         for name, detail in self.documents.items():
-            payload[name] = {
-                "model": detail.model,
-                "user_prompt": detail.user_prompt,
-                "parameters": detail.parameters,
-            }
-            response[name] = {
-                "think": detail.think,
-                "results": detail.response,
-                "usage": detail.usage,
-            }
-            hash_input = {
-                "document_id": payload["document_id"],
-                "system_prompt": payload["system_prompt"],
-                name: payload[name],
-            }
-            hashes[name] = hashlib.sha256(
-                json.dumps(hash_input, sort_keys=True, separators=(",", ":")).encode()
-            ).hexdigest()
+            payload[name], response[name] = self._section_to_structured(detail)
+            hashes[name] = self._section_hash(name, detail, payload[name])
 
         return {
             "header": {
@@ -169,27 +472,98 @@ class DocumentManager:
         self.document_header = DocumentHeader.from_structured_dict(data)
         payload = data["payload"]
         response = data["response"]
-        self.documents.clear()
+        self.documents = {}
+        self._stored_hashes = {}
 
         for key in payload:
             if key in ("document_id", "system_prompt"):
                 continue
-            detail = PromptResponse(
-                model=payload[key].get("model", ""),
-                user_prompt=payload[key].get("user_prompt", ""),
-                parameters=payload[key].get("parameters", {}),
-                think=response.get(key, {}).get("think", ""),
-                response=response.get(key, {}).get("results", ""),
-                usage=response.get(key, {}).get("usage", {}),
-            )
-            self.documents[key] = detail
+            self.documents[key] = self._section_from_structured(payload[key], response.get(key, {}))
+
+    @staticmethod
+    def _section_to_structured(detail: PromptResponse) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        payload_item = {
+            "model": detail.model,
+            "user_prompt": detail.user_prompt,
+            "parameters": detail.parameters,
+        }
+        response_item = {
+            "think": detail.think,
+            "results": detail.response,
+            "usage": detail.usage,
+        }
+        # Kept with the response, outside the hashed payload, so section hashes still use the header's
+        if detail.system_prompt:
+            response_item["system_prompt"] = detail.system_prompt
+        return payload_item, response_item
+
+    @staticmethod
+    def _section_from_structured(payload_item: Dict[str, Any], response_item: Dict[str, Any]) -> PromptResponse:
+        return PromptResponse(
+            model=payload_item.get("model", ""),
+            user_prompt=payload_item.get("user_prompt", ""),
+            system_prompt=response_item.get("system_prompt"),
+            parameters=payload_item.get("parameters", {}),
+            think=response_item.get("think", ""),
+            response=response_item.get("results", ""),
+            usage=response_item.get("usage", {}),
+        )
 
     def matches_hash(self, name: str, prompt_hash: str) -> bool:
-        hashes = self.to_structured_output().get("hashes", {})
-        return hashes.get(name) == prompt_hash
+        return self.get_hash(name) == prompt_hash
 
     def get_hash(self, name: str) -> Optional[str]:
-        return self.to_structured_output().get("hashes", {}).get(name)
+        if name not in self.documents or not self.document_header:
+            return None
+        stored = self._stored_hash(name)
+        if stored is not None:
+            return stored
+        return self._section_hash(name, self.documents[name])
+
+    def hashes(self) -> Dict[str, str]:
+        """Hashes of every section, computed only for sections that changed since the last call."""
+        if not self.document_header:
+            return {}
+        return {name: self.get_hash(name) for name in self.documents}
+
+    def _stored_hash(self, name: str) -> Optional[str]:
+        """Hash from a lazily loaded file, while the section is untouched and the header unchanged."""
+        documents = self.documents
+        if not isinstance(documents, _LazySectionMap) or documents.is_loaded(name):
+            return None
+        if (self.document_header.document_id, self.document_header.system_prompt) != self._stored_header:
+            return None
+        return self._stored_hashes.get(name)
+
+    def invalidate_hash(self, name: Optional[str] = None):
+        """Drop cached hashes after mutating a stored PromptResponse in place (all sections if name is None)."""
+        if name is None:
+            self._hash_cache.clear()
+        else:
+            self._hash_cache.pop(name, None)
+
+    def _section_hash(self, name: str, detail: PromptResponse, payload_item: Optional[Dict[str, Any]] = None) -> str:
+        header_key = (self.document_header.document_id, self.document_header.system_prompt)
+        if header_key != self._hash_header:
+            self._hash_cache.clear()
+            self._hash_header = header_key
+
+        cached = self._hash_cache.get(name)
+        if cached is not None and cached[0] is detail:
+            return cached[1]
+
+        if payload_item is None:
+            payload_item, _ = self._section_to_structured(detail)
+        hash_input = {
+            "document_id": header_key[0],
+            "system_prompt": header_key[1],
+            name: payload_item,
+        }
+        section_hash = hashlib.sha256(
+            json.dumps(hash_input, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+        self._hash_cache[name] = (detail, section_hash)
+        return section_hash
 
     def has_document(self, name: str) -> bool:
         return name in self.documents
@@ -0,0 +1,204 @@
+# schema_document_index.py
+"""
+Cross-document result index for DocumentManager files.
+
+Includes:
+- `IndexedSection`: One row of the index (file, section, hash, document id, model, usage, and the journal and
+  storage settings a reader needs to load the section).
+- `DocumentIndex`: SQLite index maintained by `DocumentManager.save_to_file` for corpus-wide
+  lookups by request hash, document id or model and aggregate usage queries, without parsing
+  any document JSON.
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_response import PromptResponse
+
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    file_path TEXT NOT NULL,
+    section TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    document_id TEXT,
+    model TEXT,
+    prompt_tokens INTEGER DEFAULT 0,
+    completion_tokens INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    updated REAL,
+    journal INTEGER DEFAULT 0,
+    storage TEXT DEFAULT 'json',
+    PRIMARY KEY (file_path, section)
+);
+CREATE INDEX IF NOT EXISTS idx_sections_hash ON sections (hash);
+CREATE INDEX IF NOT EXISTS idx_sections_document_id ON sections (document_id);
+CREATE INDEX IF NOT EXISTS idx_sections_model ON sections (model);
+"""
+
+
+@dataclass(frozen=True)
+class IndexedSection:
+    file_path: str
+    section: str
+    hash: str
+    document_id: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    journal: bool = False
+    storage: str = "json"
+
+
+class DocumentIndex:
+    def __init__(self, db_path: Union[str, Path], timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            # WAL lets many processes read while one writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Update methods
+    def update_document(self, manager, sections: Optional[Iterable[str]] = None):
+        """
+        Upsert the index rows for `manager`'s file.
+
+        :param sections: Only these sections changed; None re-indexes the whole document and drops
+            rows for sections that no longer exist.
+        """
+        if not manager.document_header:
+            return
+        file_key = self._file_key(manager.file_path)
+        document_id = manager.document_header.document_id
+        names = list(manager.documents) if sections is None else [n for n in sections if n in manager.documents]
+
+        rows = []
+        now = time.time()
+        for name in names:
+            detail = manager.get_prompt_response(name)
+            usage = detail.usage or {}
+            rows.append((
+                file_key, name, manager.get_hash(name), document_id, detail.model,
+                *(int(usage.get(key) or 0) for key in USAGE_KEYS), now, int(manager.journal), manager.storage.name,
+            ))
+
+        with self._lock, self._conn:
+            if sections is None:
+                self._conn.execute("DELETE FROM sections WHERE file_path = ?", (file_key,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sections (file_path, section, hash, document_id, model, "
+                "prompt_tokens, completion_tokens, total_tokens, updated, journal, storage) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.debug(f"Indexed {len(rows)} sections of {file_key}")
+
+    def remove_document(self, file_path: Union[str, Path]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sections WHERE file_path = ?", (self._file_key(file_path),))
+
+    def rebuild(self, file_paths: Iterable[Union[str, Path]], journal: Optional[bool] = None) -> int:
+        """
+        Index existing document files (e.g. `Path(dir).glob("*.json")`). Returns the number indexed.
+
+        :param journal: Replay each document's journal; None does so for documents that have a journal file.
+        """
+        from .schema_document import DocumentManager
+
+        count = 0
+        for file_path in file_paths:
+            manager = DocumentManager(file_path)
+            manager.journal = manager.journal_path.exists() if journal is None else journal
+            if manager.load_from_file(lazy=True):
+                self.update_document(manager)
+                count += 1
+        logger.info(f"✅ Indexed {count} documents into {self.db_path}")
+        return count
+
+    # Lookup methods
+    def find_by_hash(self, section_hash: str) -> List[IndexedSection]:
+        return self._query("SELECT * FROM sections WHERE hash = ?", (section_hash,))
+
+    def has_hash(self, section_hash: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM sections WHERE hash = ? LIMIT 1", (section_hash,)).fetchone()
+        return row is not None
+
+    def get_response(self, section_hash: str) -> Optional[PromptResponse]:
+        """Cache-style lookup: load the stored PromptResponse for a request hash, decoding only that section."""
+        for match in self.find_by_hash(section_hash):
+            manager = self._reader(match)
+            if manager.load_from_file(lazy=True) and manager.get_hash(match.section) == section_hash:
+                return manager.get_prompt_response(match.section)
+            logger.warning(f"Stale index entry for {match.file_path}:{match.section}")
+        return None
+
+    def find_by_document_id(self, document_id: str) -> List[IndexedSection]:
+        return self._query("SELECT * FROM sections WHERE document_id = ?", (document_id,))
+
+    def find_by_model(self, model: str) -> List[IndexedSection]:
+        return self._query("SELECT * FROM sections WHERE model = ?", (model,))
+
+    def files_for_model(self, model: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT file_path FROM sections WHERE model = ? ORDER BY file_path", (model,)).fetchall()
+        return [row["file_path"] for row in rows]
+
+    def usage_totals(self, group_by: Optional[str] = "model") -> Dict[Optional[str], Dict[str, int]]:
+        """Sum token usage, grouped by "model", "document_id", "file_path" or "section" (None for one total)."""
+        if group_by not in (None, "model", "document_id", "file_path", "section"):
+            raise ValueError(f"Unsupported group_by '{group_by}'")
+        group = group_by or "NULL"
+        sums = ", ".join(f"SUM({key}) AS {key}" for key in USAGE_KEYS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {group} AS grp, COUNT(*) AS sections, {sums} FROM sections GROUP BY {group}").fetchall()
+        return {
+            row["grp"]: {"sections": row["sections"], **{key: row[key] or 0 for key in USAGE_KEYS}}
+            for row in rows
+        }
+
+    # Internal methods
+    def _query(self, sql: str, params: tuple) -> List[IndexedSection]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            IndexedSection(
+                file_path=row["file_path"], section=row["section"], hash=row["hash"],
+                document_id=row["document_id"], model=row["model"],
+                **{key: row[key] for key in USAGE_KEYS},
+                journal=bool(row["journal"]), storage=row["storage"] or "json",
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _reader(match: IndexedSection):
+        """A manager that loads the document the way its writer saved it, journal included."""
+        from .schema_document import DocumentManager
+        from .schema_document_storage import STORAGE_BACKENDS
+
+        storage = match.storage if match.storage in STORAGE_BACKENDS else "json"
+        return DocumentManager(match.file_path, journal=match.journal, storage=storage)
+
+    @staticmethod
+    def _file_key(file_path: Union[str, Path]) -> str:
+        return str(Path(file_path).resolve())
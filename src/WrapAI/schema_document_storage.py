@@ -0,0 +1,149 @@
+# schema_document_storage.py
+"""
+Serialization backends for DocumentManager files.
+
+Includes:
+- `DocumentStorage`: Abstract base backend that streams a structured document to/from a binary file.
+- `JsonStorage`, `GzipJsonStorage`, `ZstdJsonStorage`, `MsgpackStorage`: Built-in backends.
+- `STORAGE_BACKENDS`: Registry of available backends by name; optional ones register only
+  when their package (`zstandard`, `msgpack`) is installed.
+- `detect_storage`: Picks the backend for an existing file from its leading magic bytes.
+"""
+
+import io
+import gzip
+import json
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+
+class DocumentStorage(ABC):
+    name = ""
+    magic = b""
+    # Only plain JSON can be memory-mapped and indexed by byte offset
+    supports_lazy = False
+
+    @abstractmethod
+    def dump(self, data: Dict[str, Any], f: BinaryIO):
+        ...
+
+    @abstractmethod
+    def load(self, f: BinaryIO) -> Dict[str, Any]:
+        ...
+
+    def matches(self, head: bytes) -> bool:
+        return bool(self.magic) and head.startswith(self.magic)
+
+
+class JsonStorage(DocumentStorage):
+    name = "json"
+    supports_lazy = True
+
+    def dump(self, data: Dict[str, Any], f: BinaryIO):
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        json.dump(data, text, indent=4, ensure_ascii=False)
+        text.flush()
+        text.detach()
+
+    def load(self, f: BinaryIO) -> Dict[str, Any]:
+        return json.load(io.TextIOWrapper(f, encoding="utf-8"))
+
+    def matches(self, head: bytes) -> bool:
+        return head.lstrip()[:1] in (b"{", b"[")
+
+
+class GzipJsonStorage(DocumentStorage):
+    name = "json.gz"
+    magic = b"\x1f\x8b"
+
+    def __init__(self, compresslevel: int = 6):
+        self.compresslevel = compresslevel
+
+    def dump(self, data: Dict[str, Any], f: BinaryIO):
+        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=self.compresslevel) as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8")
+            json.dump(data, text, ensure_ascii=False, separators=(",", ":"))
+            text.flush()
+            text.detach()
+
+    def load(self, f: BinaryIO) -> Dict[str, Any]:
+        with gzip.GzipFile(fileobj=f, mode="rb") as gz:
+            return json.load(io.TextIOWrapper(gz, encoding="utf-8"))
+
+
+class ZstdJsonStorage(DocumentStorage):
+    name = "json.zst"
+    magic = b"\x28\xb5\x2f\xfd"
+
+    def __init__(self, level: int = 10):
+        import zstandard
+        self._zstd = zstandard
+        self.level = level
+
+    def dump(self, data: Dict[str, Any], f: BinaryIO):
+        compressor = self._zstd.ZstdCompressor(level=self.level)
+        with compressor.stream_writer(f, closefd=False) as writer:
+            text = io.TextIOWrapper(writer, encoding="utf-8")
+            json.dump(data, text, ensure_ascii=False, separators=(",", ":"))
+            text.flush()
+            text.detach()
+
+    def load(self, f: BinaryIO) -> Dict[str, Any]:
+        with self._zstd.ZstdDecompressor().stream_reader(f, closefd=False) as reader:
+            return json.load(io.TextIOWrapper(reader, encoding="utf-8"))
+
+
+class MsgpackStorage(DocumentStorage):
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dump(self, data: Dict[str, Any], f: BinaryIO):
+        self._msgpack.pack(data, f, use_bin_type=True)
+
+    def load(self, f: BinaryIO) -> Dict[str, Any]:
+        return self._msgpack.unpack(f, raw=False)
+
+    def matches(self, head: bytes) -> bool:
+        # A structured document is always a map: fixmap (0x80-0x8f), map16 (0xde) or map32 (0xdf)
+        return bool(head) and (0x80 <= head[0] <= 0x8f or head[0] in (0xde, 0xdf))
+
+
+STORAGE_BACKENDS: Dict[str, DocumentStorage] = {
+    JsonStorage.name: JsonStorage(),
+    GzipJsonStorage.name: GzipJsonStorage(),
+}
+
+# Register optional backends
+for _backend in (ZstdJsonStorage, MsgpackStorage):
+    try:
+        STORAGE_BACKENDS[_backend.name] = _backend()
+    except ImportError as e:
+        logger.debug(f"Optional document storage '{_backend.name}' not available: {e}")
+
+
+def get_storage(name: str) -> DocumentStorage:
+    backend = STORAGE_BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown or unavailable document storage '{name}'. "
+                         f"Available: {list(STORAGE_BACKENDS)}")
+    return backend
+
+
+def detect_storage(file_path: str | Path) -> Optional[DocumentStorage]:
+    """Return the backend whose signature matches the start of `file_path`, or None."""
+    with Path(file_path).open("rb") as f:
+        head = f.read(16)
+    # Magic-byte formats first; JSON and msgpack are recognised by their first structural byte
+    ordered = sorted(STORAGE_BACKENDS.values(), key=lambda backend: not backend.magic)
+    for backend in ordered:
+        if backend.matches(head):
+            return backend
+    return None
@@ -160,6 +160,27 @@ class SchemaBuilder:
             self.required.append(name)
         return self
 
+    def add_object_array_property(self, name: str, item: "SchemaBuilder", required: bool = True,
+                                  description: str = None):
+        """Add an array property whose items are objects described by a nested SchemaBuilder."""
+        items = {
+            "type": "object",
+            "properties": item.properties
+        }
+        if item.required:
+            items["required"] = item.required
+        prop = {
+            "type": "array",
+            "items": items
+        }
+        if description:
+            prop["description"] = description
+
+        self.properties[name] = prop
+        if required:
+            self.required.append(name)
+        return self
+
     def add_field(self, field: SchemaField):
         if field.type == "string":
             self.add_string_property(field.name, field.required, field.description)
@@ -198,6 +219,11 @@ class SchemaBuilder:
 
         return schema
 
+    def build_compact(self, descriptions: str = "shorten", **kwargs):
+        """Build a token-compact `CompactSchema` (see schema_compact.compact_schema for options)."""
+        from .schema_compact import compact_schema
+        return compact_schema(self.build(), descriptions=descriptions, **kwargs)
+
     def to_json(self, indent: int = 4) -> str:
         """Convert the schema to a JSON string."""
         return json.dumps(self.build(), indent=indent)
@@ -0,0 +1,188 @@
+# schema_records.py
+"""
+Typed record classes generated from structured-output schemas.
+
+Includes:
+- `Record`: Base for generated classes; `__slots__` storage, `to_dict()`, equality and repr.
+- `record_class`: Generates (and caches) a `Record` subclass from a `SchemaBuilder`, its `build()` result or a
+  list of `SchemaField`s; nested objects and arrays of objects get their own record classes.
+- `RecordDecoder`: Validates a response and builds records straight from the decoded JSON, with no
+  intermediate field-by-field dict copy.
+"""
+
+import re
+import json
+import keyword
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .schema_json import SchemaBuilder, SchemaField
+from .schema_validator import compile_schema, schema_fingerprint
+
+SchemaSource = Union[dict, SchemaBuilder, List[SchemaField]]
+
+_CLASS_CACHE: Dict[Tuple[str, str], Type["Record"]] = {}
+_CLASS_CACHE_LOCK = threading.Lock()
+
+
+class Record:
+    __slots__ = ()
+    # Attribute names (slots) and the JSON keys they came from, in schema order
+    _fields: Tuple[str, ...] = ()
+    _keys: Tuple[str, ...] = ()
+    # Builds an instance from a decoded JSON object; set by record_class
+    _build: Callable[[dict], "Record"]
+
+    def __init__(self, **kwargs):
+        for attr in self._fields:
+            setattr(self, attr, kwargs.pop(attr, None))
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} got unexpected fields: {', '.join(kwargs)}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Record":
+        return cls._build(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: _unwrap(getattr(self, attr)) for attr, key in zip(self._fields, self._keys)}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self._fields)
+
+    def __repr__(self):
+        values = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+# Public Record API; schema properties with these names would shadow the methods
+_RECORD_NAMES = frozenset(name for name in vars(Record) if not name.startswith("_"))
+
+
+def record_class(schema: SchemaSource, name: Optional[str] = None) -> Type[Record]:
+    """
+    Return the record class for `schema`, generating it on first use.
+
+    :param schema: `SchemaBuilder`, its `build()` result, or a list of `SchemaField`.
+    :param name: Class name; defaults to the CamelCased schema name.
+    """
+    schema_json = _schema_json(schema, name)
+    class_name = name or _class_name(schema_json["json_schema"].get("name") or "Record")
+    cache_key = (schema_fingerprint(schema_json), class_name)
+
+    cls = _CLASS_CACHE.get(cache_key)
+    if cls is None:
+        cls = _make_class(class_name, schema_json["json_schema"]["schema"])
+        with _CLASS_CACHE_LOCK:
+            cls = _CLASS_CACHE.setdefault(cache_key, cls)
+    return cls
+
+
+class RecordDecoder:
+    def __init__(self, schema: SchemaSource, name: Optional[str] = None, validate: bool = True):
+        """
+        :param validate: Check each response with the compiled schema before building the record.
+        """
+        schema_json = _schema_json(schema, name)
+        self.record_type = record_class(schema_json, name)
+        self.compiled = compile_schema(schema_json) if validate else None
+
+    def decode(self, source: Union[str, bytes, dict, Any]) -> Record:
+        """
+        Build a record from JSON text, an already decoded dict, or a `PromptResponse` (its `response` text).
+
+        :raises ValueError: If the response is not valid JSON or violates the schema.
+        """
+        if hasattr(source, "response") and not isinstance(source, dict):
+            source = source.response
+        data = json.loads(source) if isinstance(source, (str, bytes, bytearray)) else source
+        if self.compiled is not None:
+            self.compiled.validate(data)
+        return self.record_type._build(data)
+
+    def decode_many(self, sources: Iterable[Union[str, bytes, dict, Any]]) -> Iterator[Record]:
+        for source in sources:
+            yield self.decode(source)
+
+
+def _schema_json(schema: SchemaSource, name: Optional[str]) -> dict:
+    if isinstance(schema, SchemaBuilder):
+        return schema.build()
+    if isinstance(schema, list):
+        return SchemaBuilder(name or "Record").load_properties(schema).build()
+    return schema
+
+
+def _make_class(class_name: str, schema: Dict[str, Any]) -> Type[Record]:
+    properties = schema.get("properties", {})
+    keys = tuple(properties)
+    attrs = _attribute_names(keys)
+    converters = [_converter(f"{class_name}{_class_name(key)}", prop) for key, prop in properties.items()]
+
+    cls = type(class_name, (Record,), {
+        "__slots__": attrs,
+        "_fields": attrs,
+        "_keys": keys,
+        "__module__": __name__,
+    })
+
+    # Slot descriptors set values without going through instance attribute lookup
+    plan = [(key, getattr(cls, attr).__set__, convert) for key, attr, convert in zip(keys, attrs, converters)]
+    new = object.__new__
+
+    def build(data: dict) -> Record:
+        obj = new(cls)
+        get = data.get
+        for key, set_value, convert in plan:
+            value = get(key)
+            if convert is not None and value is not None:
+                value = convert(value)
+            set_value(obj, value)
+        return obj
+
+    cls._build = staticmethod(build)
+    return cls
+
+
+def _converter(class_name: str, prop: Dict[str, Any]) -> Optional[Callable[[Any], Any]]:
+    if prop.get("type") == "object" or "properties" in prop:
+        return _make_class(class_name, prop)._build
+
+    items = prop.get("items")
+    if prop.get("type") == "array" and isinstance(items, dict):
+        item_convert = _converter(f"{class_name}Item", items)
+        if item_convert is not None:
+            return lambda values: [item_convert(v) if v is not None else None for v in values]
+    return None
+
+
+def _attribute_names(keys: Iterable[str]) -> Tuple[str, ...]:
+    attrs = []
+    for key in keys:
+        attr = re.sub(r"\W", "_", key)
+        if not attr or attr[0].isdigit() or keyword.iskeyword(attr) or attr.startswith("_") \
+                or attr in _RECORD_NAMES:
+            attr = f"f_{attr}"
+        while attr in attrs:
+            attr += "_"
+        attrs.append(attr)
+    return tuple(attrs)
+
+
+def _class_name(name: str) -> str:
+    parts = re.split(r"[^0-9A-Za-z]+", name)
+    class_name = "".join(part[:1].upper() + part[1:] for part in parts if part)
+    return class_name if class_name and not class_name[0].isdigit() else f"Record{class_name}"
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_unwrap(v) for v in value]
+    return value
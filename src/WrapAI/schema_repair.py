@@ -0,0 +1,318 @@
+# schema_repair.py
+"""
+Local repair of almost-valid structured output before falling back to another request.
+
+Includes:
+- `JsonRepairError`: Raised when the text cannot be turned into JSON locally.
+- `repair_json`: Extracts JSON from markdown fences or surrounding prose and applies safe structural repairs
+  (trailing commas, single quotes, Python literals, raw newlines in strings, truncation); returns the value and
+  the list of repairs applied.
+- `RepairStats`: Counters for clean parses, local repairs, follow-up requests and failures, with the number of
+  round trips saved.
+- `StructuredOutputRepairer`: Sits between `parse_response` and `parse_response_with_schema`; repairs locally
+  and, only if that fails, sends a short continuation (truncated output) or correction request.
+"""
+
+import re
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .prompt_response import PromptResponse
+from .schema_parser import parse_response_with_schema
+
+_FENCE = re.compile(r"```[A-Za-z0-9_-]*[ \t]*\r?\n?(.*?)(?:```|\Z)", re.DOTALL)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+TRUNCATION_REPAIR = "closed truncated output"
+
+CONTINUE_PROMPT = ("Your previous reply was cut off. Continue it exactly where it stopped, without repeating "
+                   "anything and without any commentary.")
+CORRECT_PROMPT = ("Your previous reply could not be used: {error}. Reply with only the corrected JSON, "
+                  "without any commentary.")
+
+
+class JsonRepairError(ValueError):
+    def __init__(self, message: str, truncated: bool = False):
+        super().__init__(message)
+        self.truncated = truncated
+
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Decode `text` as JSON, repairing it locally if needed.
+
+    :return: (value, repairs) where repairs names each fix applied; empty when the text was already valid.
+    :raises JsonRepairError: If no JSON could be recovered; `truncated` is set when the output looks cut off.
+    """
+    repairs = []
+    candidate = text.strip()
+    if "</think>" in candidate:
+        candidate = candidate.split("</think>", 1)[1].strip()
+        repairs.append("removed reasoning block")
+
+    # Only text that is not JSON already is searched for a fence; valid JSON may hold ``` inside a string
+    fence = _FENCE.search(candidate) if not candidate.startswith(("{", "[")) else None
+    if fence:
+        candidate = fence.group(1).strip()
+        repairs.append("extracted fenced block")
+
+    start = min((i for i in (candidate.find("{"), candidate.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise JsonRepairError("No JSON object or array found in the response.")
+    if start > 0:
+        candidate = candidate[start:]
+        repairs.append("removed leading text")
+
+    try:
+        value, end = json.JSONDecoder().raw_decode(candidate)
+        if candidate[end:].strip():
+            repairs.append("removed trailing text")
+        return value, repairs
+    except json.JSONDecodeError:
+        pass
+
+    fixed, structural, truncated = _repair_structure(candidate)
+    try:
+        value, _ = json.JSONDecoder().raw_decode(fixed)
+    except json.JSONDecodeError as e:
+        raise JsonRepairError(f"Could not repair JSON: {e}", truncated=truncated) from e
+    return value, repairs + structural
+
+
+def _repair_structure(text: str) -> Tuple[str, List[str], bool]:
+    """Rewrite `text` token by token into strict JSON; returns (text, repairs, looked_truncated)."""
+    out: List[str] = []
+    repairs = set()
+    stack: List[str] = []
+    quote = None              # quote char of the open string, if any
+    key_start = None          # index in `out` of an object key awaiting its ':'
+    expect_key = False
+    i, n = 0, len(text)
+
+    while i < n:
+        c = text[i]
+        if quote:
+            if c == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                if nxt == "'" and quote == "'":
+                    out.append("'")
+                else:
+                    out.append(text[i:i + 2])
+                i += 2
+                continue
+            if c == quote:
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+                repairs.add("escaped newline in string")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c in "\"'":
+            if c == "'":
+                repairs.add("converted single quotes")
+            if stack and stack[-1] == "{" and expect_key:
+                key_start = len(out)
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            stack.append(c)
+            expect_key = c == "{"
+            out.append(c)
+        elif c in "}]":
+            if _drop_trailing_comma(out):
+                repairs.add("removed trailing comma")
+            if stack:
+                stack.pop()
+            out.append(c)
+            expect_key = False
+            key_start = None
+        elif c == ",":
+            expect_key = bool(stack) and stack[-1] == "{"
+            out.append(c)
+        elif c == ":":
+            expect_key = False
+            key_start = None
+            out.append(c)
+        elif c.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+                repairs.add("converted Python literals")
+            else:
+                out.append(word)
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    truncated = bool(quote) or bool(stack)
+    if quote:
+        out.append('"')
+    if truncated:
+        repairs.add(TRUNCATION_REPAIR)
+        # Drop a dangling key (no ':' yet) or complete a dangling ':' so the object can be closed
+        if key_start is not None:
+            del out[key_start:]
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ":":
+            out.append("null")
+        _drop_trailing_comma(out)
+        out.extend("}" if opener == "{" else "]" for opener in reversed(stack))
+    return "".join(out), sorted(repairs), truncated
+
+
+def _drop_trailing_comma(out: List[str]) -> bool:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        return True
+    return False
+
+
+@dataclass
+class RepairStats:
+    clean: int = 0
+    repaired: int = 0
+    continued: int = 0
+    corrected: int = 0
+    failed: int = 0
+
+    @property
+    def round_trips_saved(self) -> int:
+        """Responses recovered with no further request (each would otherwise have been re-sent)."""
+        return self.repaired
+
+    @property
+    def full_reruns_avoided(self) -> int:
+        """Responses recovered locally or with a short follow-up instead of re-running the whole prompt."""
+        return self.repaired + self.continued + self.corrected
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"clean": self.clean, "repaired": self.repaired, "continued": self.continued,
+                "corrected": self.corrected, "failed": self.failed,
+                "round_trips_saved": self.round_trips_saved, "full_reruns_avoided": self.full_reruns_avoided}
+
+
+class StructuredOutputRepairer:
+    def __init__(self, client=None, schema_json: Optional[dict] = None, allow_followup: bool = True,
+                 followup_max_tokens: Optional[int] = 1024):
+        """
+        :param client: `VeniceTextPrompt`/`OpenAITextPrompt` used for follow-up requests; None repairs locally only.
+        :param schema_json: Schema (or `CompactSchema`) passed to `parse_response_with_schema`; None returns
+            the repaired JSON as decoded.
+        :param followup_max_tokens: `max_completion_tokens` for continuation/correction requests.
+        """
+        self.client = client
+        self.schema_json = schema_json
+        self.allow_followup = allow_followup
+        self.followup_max_tokens = followup_max_tokens
+        self.stats = RepairStats()
+
+    def parse(self, response: PromptResponse | str) -> Optional[dict]:
+        """Return the schema-parsed dict for `response`, or None if it could not be recovered."""
+        text = response.response if isinstance(response, PromptResponse) else response
+        try:
+            value, repairs = repair_json(text)
+        except JsonRepairError as e:
+            return self._follow_up(response, text, e, e.truncated)
+        truncated = TRUNCATION_REPAIR in repairs
+        if truncated and self._can_follow_up(response):
+            # The last value of a cut-off object may itself be cut off; ask for the rest instead of guessing
+            return self._follow_up(response, text, JsonRepairError("Output was truncated", truncated=True), True)
+        try:
+            result = self._validate(value)
+        except ValueError as e:
+            return self._follow_up(response, text, e, truncated)
+
+        if truncated:
+            self.stats.repaired += 1
+            logger.warning("⚠️ Closed truncated structured output locally; the last value may be incomplete")
+        elif repairs:
+            self.stats.repaired += 1
+            logger.info(f"🔧 Repaired structured output locally: {', '.join(repairs)}")
+        else:
+            self.stats.clean += 1
+        return result
+
+    def _can_follow_up(self, response: PromptResponse | str) -> bool:
+        return bool(self.allow_followup and self.client and isinstance(response, PromptResponse))
+
+    def _raw_content(self, reply: PromptResponse) -> str:
+        """The reply text before `.strip()`; whitespace at the start of a continuation may be inside a string."""
+        data = getattr(self.client, "last_response_json", None) or {}
+        message = ((data.get("choices") or [{}])[0]).get("message") or {}
+        content = message.get("content")
+        if not isinstance(content, str):
+            return reply.response or ""
+        if "</think>" in content:
+            content = content.split("</think>", 1)[1].lstrip()
+        return content
+
+    def _validate(self, value: Any) -> Any:
+        if self.schema_json is None:
+            return value
+        return parse_response_with_schema(value, self.schema_json)
+
+    def _follow_up(self, response: PromptResponse | str, text: str, error: Exception,
+                   truncated: bool) -> Optional[dict]:
+        if not self._can_follow_up(response):
+            self.stats.failed += 1
+            logger.error(f"⚠️ Structured output could not be repaired: {error}")
+            return None
+
+        # Sections loaded from older documents carry no system prompt
+        messages = [{"role": "system", "content": response.system_prompt}] if response.system_prompt else []
+        messages += [
+            {"role": "user", "content": response.user_prompt},
+            {"role": "assistant", "content": text},
+            {"role": "user", "content": CONTINUE_PROMPT if truncated else CORRECT_PROMPT.format(error=error)},
+        ]
+
+        attributes = self.client.attributes
+        saved = attributes.max_completion_tokens, attributes.response_format
+        attributes.max_completion_tokens = self.followup_max_tokens
+        # A continuation is a fragment, not a schema-conforming object; a correction is a full object
+        schema = getattr(self.schema_json, "schema_json", self.schema_json)
+        attributes.response_format = None if truncated else schema or attributes.response_format
+        try:
+            reply = self.client.prompt(response.user_prompt, response.system_prompt, messages=messages)
+        finally:
+            attributes.max_completion_tokens, attributes.response_format = saved
+
+        if reply is None:
+            self.stats.failed += 1
+            return None
+
+        combined = text + self._raw_content(reply) if truncated else reply.response
+        try:
+            value, _ = repair_json(combined)
+            result = self._validate(value)
+        except ValueError as e:
+            self.stats.failed += 1
+            logger.error(f"⚠️ Follow-up did not produce valid structured output: {e}")
+            return None
+
+        if truncated:
+            self.stats.continued += 1
+            logger.info("🔄 Recovered truncated output with a continuation request")
+        else:
+            self.stats.corrected += 1
+            logger.info("🔄 Recovered structured output with a correction request")
+        return result
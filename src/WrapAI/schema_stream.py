@@ -0,0 +1,178 @@
+# schema_stream.py
+"""
+Incremental parsing and validation of streamed structured output.
+
+Includes:
+- `SchemaViolation`: Raised as soon as a streamed field breaks the schema.
+- `IncrementalJsonParser`: Consumes a JSON object in arbitrary text chunks and emits each top-level
+  field once its value has closed, skipping any leading text such as a code fence.
+- `StreamingSchemaValidator`: Feeds chunks through the parser and checks every closed field with the
+  compiled schema; reports when all required fields have arrived.
+"""
+
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .schema_validator import CompiledSchema, compile_schema
+
+# Characters that end or escape a JSON string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class SchemaViolation(ValueError):
+    def __init__(self, message: str, field: Optional[str] = None):
+        super().__init__(message)
+        self.field = field
+
+
+class IncrementalJsonParser:
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add a chunk of text; return the (name, value) pairs of top-level fields completed by it."""
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+        i = self._pos
+
+        if not self._started:
+            start = text.find("{", i)
+            if start < 0:
+                self._text = ""
+                self._pos = 0
+                return []
+            self._started = True
+            self._depth = 1
+            self._expect_key = True
+            i = start + 1
+
+        length = len(text)
+        while i < length:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    i = length
+                    break
+                i = match.end()
+                if match.group() == "\\":
+                    if i >= length:
+                        # Escape split across chunks; resume at the backslash
+                        i -= 1
+                        break
+                    i += 1
+                else:
+                    self._in_string = False
+                continue
+
+            char = text[i]
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_value(text, i, completed)
+                    self.done = True
+                    i += 1
+                    break
+            elif self._depth == 1:
+                if char == ":" and self._expect_key:
+                    self._key = self._decode(text[self._key_start:i])
+                    self._value_start = i + 1
+                    self._expect_key = False
+                elif char == ",":
+                    self._close_value(text, i, completed)
+                    self._expect_key = True
+            i += 1
+
+        # Drop consumed text so long streams don't keep re-copying the whole buffer
+        keep = min(x for x in (self._value_start, self._key_start, i) if x is not None)
+        if self.done:
+            keep = i
+        self._text = text[keep:]
+        self._pos = i - keep
+        if self._value_start is not None:
+            self._value_start -= keep
+        if self._key_start is not None:
+            self._key_start -= keep
+        return completed
+
+    def _close_value(self, text: str, end: int, completed: List[Tuple[str, Any]]):
+        if self._key is None:
+            return
+        value = self._decode(text[self._value_start:end])
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    @staticmethod
+    def _decode(fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError as e:
+            raise SchemaViolation(f"Malformed JSON in streamed output: {e}") from e
+
+
+class StreamingSchemaValidator:
+    def __init__(self, schema: dict | CompiledSchema):
+        """
+        :param schema: A `SchemaBuilder.build()` result or an already compiled schema.
+        """
+        self.compiled = schema if isinstance(schema, CompiledSchema) else compile_schema(schema)
+        self.parser = IncrementalJsonParser()
+        self._missing = set(self.compiled.required_names)
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        return self.parser.fields
+
+    @property
+    def complete(self) -> bool:
+        """True once every required field has arrived and passed validation."""
+        return not self._missing
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the object has been seen."""
+        return self.parser.done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Parse `chunk` and validate newly closed fields; raises SchemaViolation on the first bad one."""
+        completed = self.parser.feed(chunk)
+        for name, value in completed:
+            try:
+                self.compiled.validate_field(name, value)
+            except ValueError as e:
+                raise SchemaViolation(str(e), field=name) from e
+            self._missing.discard(name)
+        return completed
+
+    def result(self, include_missing_optionals: bool = False) -> dict:
+        """Validate the fields received so far as a whole response."""
+        try:
+            return self.compiled.parse(self.fields, include_missing_optionals=include_missing_optionals)
+        except ValueError as e:
+            raise SchemaViolation(str(e)) from e
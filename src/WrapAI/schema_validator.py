@@ -0,0 +1,199 @@
+# schema_validator.py
+"""
+Compiled validators for structured-output schemas.
+
+Includes:
+- `CompiledSchema`: Validator compiled once from a `SchemaBuilder.build()` result; checks the full
+  nested structure (objects, array items, enums, consts) with precompiled per-field closures.
+- `compile_schema`: Returns the cached `CompiledSchema` for a schema with the same fingerprint.
+- `schema_fingerprint`: Stable SHA-256 of a schema dict.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+from .schema_json import SchemaField, extract_schema_fields_from_json
+
+Checker = Callable[[Any, str], None]
+
+_TYPE_CHECKS: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    "string": (lambda v: isinstance(v, str), "a string"),
+    "integer": (lambda v: isinstance(v, int) and not isinstance(v, bool), "an integer"),
+    "number": (lambda v: isinstance(v, (int, float)) and not isinstance(v, bool), "a number"),
+    "boolean": (lambda v: isinstance(v, bool), "a boolean"),
+    "array": (lambda v: isinstance(v, list), "a list"),
+    "object": (lambda v: isinstance(v, dict), "an object"),
+    "null": (lambda v: v is None, "null"),
+}
+
+_CACHE: Dict[str, "CompiledSchema"] = {}
+_CACHE_LOCK = threading.Lock()
+CACHE_MAX_SIZE = 256
+
+
+def schema_fingerprint(schema_json: dict) -> str:
+    return hashlib.sha256(json.dumps(schema_json, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def compile_schema(schema_json: "dict | CompiledSchema") -> "CompiledSchema":
+    """
+    Compile `schema_json` or return the cached validator for an identical schema.
+
+    Schemas are looked up by content, so one changed in place (e.g. by `reconcile_schema_fields`) is compiled
+    again; pass a `CompiledSchema` to skip the fingerprint on hot paths.
+    """
+    if isinstance(schema_json, CompiledSchema):
+        return schema_json
+
+    fingerprint = schema_fingerprint(schema_json)
+    compiled = _CACHE.get(fingerprint)
+    with _CACHE_LOCK:
+        if compiled is None:
+            compiled = CompiledSchema(schema_json, fingerprint=fingerprint)
+            if len(_CACHE) >= CACHE_MAX_SIZE:
+                _CACHE.pop(next(iter(_CACHE)))
+            _CACHE[fingerprint] = compiled
+    return compiled
+
+
+class CompiledSchema:
+    def __init__(self, schema_json: dict, fingerprint: Optional[str] = None):
+        self.schema_json = schema_json
+        self.name = schema_json["json_schema"].get("name", "")
+        self.fingerprint = fingerprint or schema_fingerprint(schema_json)
+        self.fields: List[SchemaField] = extract_schema_fields_from_json(schema_json)
+
+        schema = schema_json["json_schema"]["schema"]
+        properties = schema.get("properties", {})
+        # (name, required, checker) per top-level field, in schema order
+        self._fields: List[Tuple[str, bool, Checker]] = [
+            (field.name, field.required, _compile_property(properties[field.name]))
+            for field in self.fields
+        ]
+        self._field_checks: Dict[str, Tuple[bool, Checker]] = {
+            name: (required, check) for name, required, check in self._fields
+        }
+        self.required_names: Tuple[str, ...] = tuple(name for name, required, _ in self._fields if required)
+
+    def validate(self, data: Any) -> None:
+        """Raise ValueError describing the first violation, including nested paths like 'items[2].name'."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Response for schema '{self.name}' should be an object.")
+        for name, required, check in self._fields:
+            value = data.get(name)
+            if value is None:
+                if required:
+                    raise ValueError(f"Missing required field: {name}")
+                continue
+            check(value, name)
+
+    def validate_field(self, name: str, value: Any) -> None:
+        """Check a single top-level field; names outside the schema are ignored."""
+        entry = self._field_checks.get(name)
+        if entry is None:
+            return
+        required, check = entry
+        if value is None:
+            if required:
+                raise ValueError(f"Missing required field: {name}")
+            return
+        check(value, name)
+
+    def is_valid(self, data: Any) -> bool:
+        try:
+            self.validate(data)
+            return True
+        except ValueError:
+            return False
+
+    def parse(self, response_json: dict, include_missing_optionals: bool = False) -> dict:
+        """Validate and return a new dict holding only the schema's top-level fields."""
+        parsed = {}
+        for name, required, check in self._fields:
+            value = response_json.get(name)
+            if value is None:
+                if required:
+                    raise ValueError(f"Missing required field: {name}")
+                elif include_missing_optionals:
+                    parsed[name] = None
+                continue
+            check(value, name)
+            parsed[name] = value
+        return parsed
+
+
+def _compile_property(prop: Dict[str, Any]) -> Checker:
+    field_type = prop.get("type")
+
+    if field_type == "array":
+        item_check = _compile_property(prop["items"]) if isinstance(prop.get("items"), dict) else None
+
+        def check_array(value, path):
+            if not isinstance(value, list):
+                raise ValueError(f"Field '{path}' should be a list.")
+            if item_check is not None:
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]")
+        return check_array
+
+    if "enum" in prop:
+        allowed = prop["enum"]
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise ValueError(f"Invalid value '{value}' for enum field '{path}'.")
+        return check_enum
+
+    if "const" in prop:
+        expected = prop["const"]
+
+        def check_const(value, path):
+            if value != expected:
+                raise ValueError(f"Field '{path}' must be '{expected}'.")
+        return check_const
+
+    if field_type == "object" or "properties" in prop:
+        properties = prop.get("properties", {})
+        required = set(prop.get("required", []))
+        children = [
+            (name, name in required or "const" in child, _compile_property(child))
+            for name, child in properties.items()
+        ]
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                raise ValueError(f"Field '{path}' should be an object.")
+            for name, is_required, check in children:
+                child = value.get(name)
+                if child is None:
+                    if is_required:
+                        raise ValueError(f"Missing required field: {path}.{name}")
+                    continue
+                check(child, f"{path}.{name}")
+        return check_object
+
+    types = field_type if isinstance(field_type, list) else [field_type] if field_type else []
+    known = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+    if not known:
+        return lambda value, path: None
+
+    if len(known) == 1:
+        type_check, label = known[0]
+
+        def check_type(value, path):
+            if not type_check(value):
+                raise ValueError(f"Field '{path}' should be {label}.")
+        return check_type
+
+    labels = " or ".join(label for _, label in known)
+
+    def check_union(value, path):
+        if not any(type_check(value) for type_check, _ in known):
+            raise ValueError(f"Field '{path}' should be {labels}.")
+    return check_union
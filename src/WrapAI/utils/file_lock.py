@@ -0,0 +1,97 @@
+# file_lock.py
+"""
+Advisory inter-process file lock.
+
+Includes:
+- `FileLock`: Reentrant exclusive lock on a sidecar lock file using `fcntl.flock` (POSIX)
+  or `msvcrt.locking` (Windows), with an optional acquire timeout.
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Logger Configuration
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    def __init__(self, lock_path: str | Path, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.lock_path = Path(lock_path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth:
+            self._depth += 1
+            return
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock(fd)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    raise TimeoutError(f"Timed out waiting for lock {self.lock_path}")
+                time.sleep(self.poll_interval)
+
+        self._fd = fd
+        self._depth = 1
+        logger.debug(f"Acquired lock {self.lock_path}")
+
+    def release(self):
+        if not self._depth:
+            raise RuntimeError(f"Lock {self.lock_path} is not held.")
+        self._depth -= 1
+        if not self._depth:
+            try:
+                self._unlock(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+                logger.debug(f"Released lock {self.lock_path}")
+        self._thread_lock.release()
+
+    @property
+    def is_locked(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    @staticmethod
+    def _try_lock(fd: int):
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    @staticmethod
+    def _unlock(fd: int):
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
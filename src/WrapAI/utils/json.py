@@ -4,10 +4,13 @@ Utilities for formatting prompt templates.
 
 Includes:
 - `DataclassJSONEncoder`: Serializes dataclass instances to JSON-friendly dicts.
+- `JsonOffsetScanner`: Finds byte offsets of JSON values so large files can be decoded piecemeal.
 """
 
+import re
 import json
 from dataclasses import asdict, is_dataclass
+from typing import Any, Dict
 import logging
 
 # Logger Configuration
@@ -18,3 +21,81 @@ class DataclassJSONEncoder(json.JSONEncoder):
         if is_dataclass(obj):
             return asdict(obj)
         return super().default(obj)
+
+
+# Byte-level patterns used to walk JSON without decoding it
+_WS_RE = re.compile(rb'[ \t\r\n]*')
+_STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_STRUCT_RE = re.compile(rb'["{}\[\]]')
+_SCALAR_RE = re.compile(rb'[^,:}\]\s]+')
+
+
+class JsonOffsetScanner:
+    """
+    Locates values inside a UTF-8 JSON buffer (bytes or mmap) by byte offset without decoding them.
+    Only the values a caller asks for are ever passed to `json.loads`.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def skip_ws(self, pos: int) -> int:
+        return _WS_RE.match(self.buffer, pos).end()
+
+    def expect(self, pos: int, char: bytes) -> int:
+        if self.buffer[pos:pos + 1] != char:
+            raise ValueError(f"Malformed JSON: expected {char!r} at byte {pos}")
+        return pos + 1
+
+    def skip_value(self, pos: int) -> int:
+        """Return the offset just past the JSON value starting at `pos`."""
+        first = self.buffer[pos:pos + 1]
+        if first == b'"':
+            return self._skip_string(pos)
+        if first not in (b'{', b'['):
+            match = _SCALAR_RE.match(self.buffer, pos)
+            if not match:
+                raise ValueError(f"Malformed JSON: no value at byte {pos}")
+            return match.end()
+
+        depth = 0
+        while True:
+            match = _STRUCT_RE.search(self.buffer, pos)
+            if not match:
+                raise ValueError("Malformed JSON: unterminated object or array")
+            char = match.group()
+            if char == b'"':
+                pos = self._skip_string(match.start())
+                continue
+            depth += 1 if char in (b'{', b'[') else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+
+    def object_spans(self, pos: int) -> tuple[Dict[str, tuple[int, int]], int]:
+        """Map each key of the object starting at `pos` to the (start, end) byte span of its value."""
+        spans = {}
+        pos = self.skip_ws(self.expect(pos, b'{'))
+        if self.buffer[pos:pos + 1] == b'}':
+            return spans, pos + 1
+
+        while True:
+            key_end = self._skip_string(pos)
+            key = json.loads(self.buffer[pos:key_end])
+            start = self.skip_ws(self.expect(self.skip_ws(key_end), b':'))
+            end = self.skip_value(start)
+            spans[key] = (start, end)
+
+            pos = self.skip_ws(end)
+            if self.buffer[pos:pos + 1] == b'}':
+                return spans, pos + 1
+            pos = self.skip_ws(self.expect(pos, b','))
+
+    def decode(self, span: tuple[int, int]) -> Any:
+        return json.loads(self.buffer[span[0]:span[1]])
+
+    def _skip_string(self, pos: int) -> int:
+        match = _STRING_RE.match(self.buffer, pos)
+        if not match:
+            raise ValueError(f"Malformed JSON: expected string at byte {pos}")
+        return match.end()
@@ -1,12 +1,163 @@
 # markdown.py
 
 from pathlib import Path
+from bisect import bisect_left
+from typing import Iterable, Iterator
 import re
 import logging
 
 # Logger Configuration
 logger = logging.getLogger(__name__)
 
+# Cleaning passes, in order. Later passes see the output of earlier ones (e.g. link URLs are gone before
+# emphasis markers are paired), so the order is part of the output format. Each pass is skipped when none of
+# its trigger characters occur in the text.
+_CLEANING_PASSES = (
+    # (trigger characters, compiled pattern, replacement)
+    ("`", re.compile(r"```.*?```", re.DOTALL), ""),                       # code blocks
+    ("`", re.compile(r"`[^`\n]*`"), ""),                                 # inline code (same matches as `.*?`)
+    ("!", re.compile(r"!\[.*?\]\(.*?\)"), ""),                           # images
+    ("[", re.compile(r"\[([^\]]+)\]\(.*?\)"), r"\1"),                     # links, keep the text
+    ("*_", re.compile(r"(\*\*|__)(.*?)\1"), r"\2"),                       # bold
+    # italics; same matches as (\*|_)(.*?)\1, the lazy body always stops at the first closing marker
+    ("*_", re.compile(r"\*([^*\n]*)\*|_([^_\n]*)_"), r"\1\2"),
+    ("#", re.compile(r"^\s*#{1,6}\s*", re.MULTILINE), ""),                # headings
+    ("-*_", re.compile(r"^\s*[-*_]{3,}\s*$", re.MULTILINE), ""),          # horizontal rules
+    (">", re.compile(r"^\s*>+\s*", re.MULTILINE), ""),                    # blockquotes
+    ("-+*", re.compile(r"^\s*[-+*]\s+", re.MULTILINE), ""),               # unordered list markers
+    ("0123456789", re.compile(r"^\s*\d+\.\s+", re.MULTILINE), ""),        # ordered list numbers
+)
+
+# Passes that remove whole spans (code and images) and the rest. Streaming runs them as two stages, because the
+# link pass pairs brackets in the text left after the span passes.
+_SPAN_PASSES = _CLEANING_PASSES[:3]
+_LINE_PASSES = _CLEANING_PASSES[3:]
+_ALL_WHITESPACE_RUNS = re.compile(r"\s{2,}")
+_INLINE_WHITESPACE_RUNS = re.compile(r"[ \t]{2,}")
+_CODE_BLOCKS = _CLEANING_PASSES[0][1]
+
+# Streaming reads this many characters at a time by default; a buffer that grows past the limit without a safe
+# split point (e.g. an unclosed code fence) is cleaned as is.
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_MAX_BUFFER = 64 << 20
+
+
+def _apply_passes(text: str, passes) -> str:
+    for triggers, pattern, replacement in passes:
+        if any(char in text for char in triggers):
+            text = pattern.sub(replacement, text)
+    return text
+
+
+def _span_split(text: str) -> int:
+    """
+    Largest index at which the span passes can be applied to each side of `text` separately, or 0: a line
+    start that is not inside a code block and not after an unclosed fence (the other span passes are line-local).
+    """
+    blocks = [match.span() for match in _CODE_BLOCKS.finditer(text)]
+    starts = [start for start, _ in blocks]
+    open_fence = text.find("```", blocks[-1][1] if blocks else 0)
+    end = open_fence + 1 if open_fence >= 0 else len(text)
+    while True:
+        newline = text.rfind("\n", 0, end)
+        if newline < 0:
+            return 0
+        split = newline + 1
+        block = bisect_left(starts, split) - 1
+        if block < 0 or blocks[block][1] <= split:
+            return split
+        end = blocks[block][0]
+
+
+def _line_split(text: str) -> int:
+    """
+    Largest index at which the remaining passes can be applied to each side of `text` separately, or 0.
+
+    The split starts a line that begins with a letter: no line pattern can start there and no whitespace run
+    or `$` can reach across it. It must not follow a `[` whose `]` has not been seen yet, since link text may
+    span lines.
+    """
+    end = len(text) - 1  # the character after the split is kept as a sentinel, so it must exist
+    while True:
+        newline = text.rfind("\n", 0, end)
+        if newline < 0:
+            return 0
+        split, end = newline + 1, newline
+        if not text[split].isalpha():
+            continue
+        bracket = text.find("[", text.rfind("]", 0, split) + 1, split)
+        if bracket < 0:
+            return split
+        end = bracket
+
+
+def _streamed(chunks: Iterable[str], find_split, clean, max_buffer: int, sentinel: bool) -> Iterator[str]:
+    """Apply `clean` to `chunks` piecewise, splitting the accumulated text where `find_split` allows."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        split = find_split(buffer)
+        if split:
+            # With a sentinel, the first character after the split is cleaned along and dropped again, so
+            # patterns ending in `$` or `\s*` see the same right-hand context as in the whole text
+            yield clean(buffer[:split + 1])[:-1] if sentinel else clean(buffer[:split])
+            buffer = buffer[split:]
+        elif len(buffer) > max_buffer:
+            logger.warning(f"⚠️ No safe split point in {len(buffer)} characters of markdown; cleaning it as is")
+            yield clean(buffer)
+            buffer = ""
+    if buffer:
+        yield clean(buffer)
+
+
+class MarkdownCleaner:
+    """Shared markdown-to-text engine behind MarkdownToText and MarkdownToTextFromString."""
+
+    def __init__(self, collapse_newlines: bool = True):
+        """
+        :param collapse_newlines: Collapse any whitespace run (newlines included) to one space; otherwise only
+            runs of spaces/tabs are collapsed and line structure is kept.
+        """
+        self.collapse_newlines = collapse_newlines
+        self._whitespace = _ALL_WHITESPACE_RUNS if collapse_newlines else _INLINE_WHITESPACE_RUNS
+
+    def clean(self, md_text: str) -> str:
+        """Converts Markdown text to plain text by removing common Markdown syntax."""
+        return self._whitespace.sub(" ", _apply_passes(md_text, _CLEANING_PASSES)).strip()
+
+    def iter_clean(self, chunks: Iterable[str], max_buffer: int = DEFAULT_MAX_BUFFER) -> Iterator[str]:
+        """
+        Clean markdown arriving in pieces, yielding text as soon as it is final. Joining the output gives the
+        same result as `clean` on the joined input, as long as no code block or link spans more than
+        `max_buffer` characters.
+
+        :param chunks: Markdown text in arbitrary pieces (e.g. fixed-size file reads).
+        :param max_buffer: Characters held back at most while waiting for a safe split point.
+        """
+        spans_removed = _streamed(chunks, _span_split, lambda text: _apply_passes(text, _SPAN_PASSES),
+                                  max_buffer, sentinel=False)
+        cleaned = _streamed(spans_removed, _line_split, self._clean_lines, max_buffer, sentinel=True)
+
+        started = False
+        pending = ""  # trailing whitespace, emitted only if more text follows (mirrors the final strip)
+        for chunk in cleaned:
+            if not started:
+                chunk = chunk.lstrip()
+                started = bool(chunk)
+            body = chunk.rstrip()
+            if body:
+                yield pending + body
+                pending = chunk[len(body):]
+            else:
+                pending += chunk
+
+    def _clean_lines(self, text: str) -> str:
+        return self._whitespace.sub(" ", _apply_passes(text, _LINE_PASSES))
+
+# Engines behind MarkdownToText (flattens whitespace) and MarkdownToTextFromString (keeps lines)
+FILE_CLEANER = MarkdownCleaner(collapse_newlines=True)
+STRING_CLEANER = MarkdownCleaner(collapse_newlines=False)
+
 class MarkdownToText:
     def __init__(self, resource_path):
         """Initialize with the MD path."""
@@ -40,34 +191,16 @@ class MarkdownToText:
             logger.error(f"An error occurred while extracting clean text: {e}")
             return None
 
+    def iter_clean_text(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Yields clean text while reading the MD file `chunk_size` characters at a time."""
+        with self.md_path.open('r', encoding='utf-8') as file:
+            yield from FILE_CLEANER.iter_clean(iter(lambda: file.read(chunk_size), ''))
+
     # Helper methods
     @staticmethod
     def _strip_markdown(md_text):
         """Converts Markdown text to plain text by removing common Markdown syntax."""
-        # Remove code blocks
-        text = re.sub(r'```.*?```', '', md_text, flags=re.DOTALL)
-        # Remove inline code
-        text = re.sub(r'`.*?`', '', text)
-        # Remove images
-        text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
-        # Remove links but keep the link text
-        text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', text)
-        # Remove emphasis and strong emphasis
-        text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
-        text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
-        # Remove headings
-        text = re.sub(r'^\s*#{1,6}\s*', '', text, flags=re.MULTILINE)
-        # Remove horizontal rules
-        text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
-        # Remove blockquotes
-        text = re.sub(r'^\s*>+\s*', '', text, flags=re.MULTILINE)
-        # Remove unordered list markers
-        text = re.sub(r'^\s*[-+*]\s+', '', text, flags=re.MULTILINE)
-        # Remove ordered list numbers
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-        # Remove extra spaces
-        text = re.sub(r'\s{2,}', ' ', text)
-        return text.strip()
+        return FILE_CLEANER.clean(md_text)
 
     # Save methods
     def save_clean_text(self, output_path):
@@ -85,6 +218,19 @@ class MarkdownToText:
             logger.error(f"An error occurred while saving clean text: {e}")
             return None
 
+    def stream_clean_text(self, output_path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Cleans the MD file into `output_path` chunk by chunk, without holding either file in memory."""
+        try:
+            output_path = Path(output_path)
+            with output_path.open('w', encoding='utf-8') as file:
+                for text in self.iter_clean_text(chunk_size):
+                    file.write(text)
+            logger.info(f"Cleaned text streamed to: {output_path}")
+            return output_path
+        except Exception as e:
+            logger.error(f"An error occurred while streaming clean text: {e}")
+            return None
+
 
 class MarkdownToTextFromString:
     def __init__(self, resource):
@@ -111,24 +257,7 @@ class MarkdownToTextFromString:
     @staticmethod
     def _strip_markdown(md_text):
         """Converts Markdown text to plain text by removing common Markdown syntax."""
-        text = re.sub(r'```.*?```', '', md_text, flags=re.DOTALL)  # Remove code blocks
-        text = re.sub(r'`.*?`', '', text)  # Remove inline code
-        text = re.sub(r'!\[.*?\]\(.*?\)', '', text)  # Remove images
-        text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', text)  # Remove links but keep text
-        text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)  # Remove bold
-        text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)  # Remove italics
-        text = re.sub(r'^\s*#{1,6}\s*', '', text, flags=re.MULTILINE)  # Remove headings
-        text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)  # Remove horizontal rules
-        text = re.sub(r'^\s*>+\s*', '', text, flags=re.MULTILINE)  # Remove blockquotes
-        text = re.sub(r'^\s*[-+*]\s+', '', text, flags=re.MULTILINE)  # Remove unordered lists
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)  # Remove ordered lists
-        # text = re.sub(r'\s{2,}', ' ', text)  # Remove extra spaces
-        text = re.sub(r'[ \t]{2,}', ' ', text)  # Collapse multiple spaces/tabs without affecting newlines
-        text = re.sub(r' {2,}', ' ', text)
-
-
-
-        return text.strip()
+        return STRING_CLEANER.clean(md_text)
 
     def save_clean_text(self, output_path):
         """Saves the plain text to a specified file path."""
@@ -1,5 +1,7 @@
 # token_char.py
 
+from functools import lru_cache
+
 import tiktoken
 import logging
 
@@ -7,20 +9,32 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def count_characters_and_tokens(text, model='gpt-3.5-turbo'):
-    """Returns the character count and token count of the input text."""
-    # Character count
-    char_count = len(text)
-
-    # Token count using tiktoken
+@lru_cache(maxsize=None)
+def get_encoding(model='gpt-3.5-turbo'):
+    """Returns the tiktoken encoding for the model, loaded once per model name."""
     try:
         # Attempt to get encoding for the specified model
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
         # Fallback to a default encoding if model-specific encoding is unavailable
         logger.error(f"Model '{model}' not found. Using 'gpt-3.5-turbo' encoding as a fallback.")
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
 
-    token_count = len(encoding.encode(text))
+def count_characters_and_tokens(text, model='gpt-3.5-turbo'):
+    """Returns the character count and token count of the input text."""
+    # Character count
+    char_count = len(text)
+
+    # Token count using tiktoken
+    token_count = len(get_encoding(model).encode_ordinary(text))
     return char_count, token_count
 
+
+def truncate_to_tokens(text, max_tokens, model='gpt-3.5-turbo'):
+    """Returns the longest prefix of the text that is at most max_tokens tokens."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max(max_tokens, 0)])
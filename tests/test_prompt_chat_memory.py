@@ -0,0 +1,13 @@
+# test_prompt_chat_memory.py
+
+from WrapAI.prompt_chat_memory import ConversationMemory
+
+
+def test_tool_result_never_trims_its_own_assistant_turn():
+    memory = ConversationMemory("system", max_tokens=60, token_buffer=0)
+    memory.add_message("user", "question " * 10)
+    memory.add_tool_calls([{"id": "1", "type": "function", "function": {"name": "f", "arguments": "{}"}}])
+
+    # Over the limit on its own: the older turns go, the assistant turn it answers stays
+    memory.add_tool_result("1", "result " * 80, "f")
+    assert [message["role"] for message in memory.messages] == ["system", "assistant", "tool"]
@@ -0,0 +1,60 @@
+# test_prompt_pipeline.py
+
+from WrapAI import DocumentManager, PromptLibrary, PromptPipeline, PromptResponse, PromptTemplate
+from WrapAI.prompt_text import OpenAITextPrompt
+
+
+class FakeClient(OpenAITextPrompt):
+    """Answers locally like the API does: with a dated snapshot id instead of the requested model."""
+    calls = []
+
+    def prompt(self, user_prompt, system_prompt="", messages=None):
+        FakeClient.calls.append(user_prompt)
+        return PromptResponse(model=f"{self.model}-2024", user_prompt=user_prompt, system_prompt=system_prompt,
+                              parameters=self.attributes.to_dict(skip_none=True), response=f"out {user_prompt}")
+
+
+def _pipeline(library, path):
+    doc = DocumentManager(path)
+    if not doc.load_from_file():
+        doc.create_header("doc", "header system prompt")
+    return PromptPipeline(library, document_manager=doc, client_factory=lambda: FakeClient("key", "m1"))
+
+
+def _library() -> PromptLibrary:
+    return PromptLibrary(prompts={
+        "a": PromptTemplate(type="t", subtype="s", prompt_text="A", prompt_system_use=True, prompt_system_text="S1"),
+        "b": PromptTemplate(type="t", subtype="s", prompt_text="B @@a@@"),
+    })
+
+
+def test_ensure_up_to_date_reuses_sections_answered_by_a_model_snapshot(tmp_path):
+    library = _library()
+    FakeClient.calls = []
+    assert sorted(_pipeline(library, tmp_path / "doc.json").run().responses) == ["a", "b"]
+
+    result = _pipeline(library, tmp_path / "doc.json").ensure_up_to_date()
+    assert sorted(result.fresh) == ["a", "b"]
+    assert not result.responses
+    assert len(FakeClient.calls) == 2
+
+
+def test_ensure_up_to_date_reruns_node_whose_system_prompt_changed(tmp_path):
+    library = _library()
+    _pipeline(library, tmp_path / "doc.json").run()
+
+    library.get_prompt("a").prompt_system_text = "S2"
+    result = _pipeline(library, tmp_path / "doc.json").ensure_up_to_date()
+    assert sorted(result.responses) == ["a"]
+    assert result.fresh == ["b"]
+
+
+def test_section_hash_still_uses_the_header_system_prompt(tmp_path):
+    library = _library()
+    pipeline = _pipeline(library, tmp_path / "doc.json")
+    pipeline.run()
+
+    doc = pipeline.document_manager
+    before = doc.get_hash("a")
+    doc.document_header.system_prompt = "edited header"
+    assert doc.get_hash("a") != before
@@ -0,0 +1,13 @@
+# test_prompt_preflight.py
+
+from WrapAI import ContextPreflight
+
+
+def test_special_token_text_is_counted_not_rejected():
+    preflight = ContextPreflight(limits={"m": 64}, min_completion_tokens=8)
+    messages = [{"role": "user", "content": "explain <|endoftext|> " + "word " * 200}]
+
+    trimmed, result = preflight.check("m", messages)
+    assert result.truncated_tokens
+    assert result.prompt_tokens <= 64 - 8
+    assert trimmed[-1]["content"].startswith("explain <|endoftext|>")
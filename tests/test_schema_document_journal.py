@@ -0,0 +1,42 @@
+# test_schema_document_journal.py
+
+from WrapAI import DocumentManager, PromptResponse
+
+
+def _section(text: str) -> PromptResponse:
+    return PromptResponse(model="m", user_prompt=f"prompt {text}", response=text)
+
+
+def test_compaction_keeps_sections_journaled_by_other_writers(tmp_path):
+    path = tmp_path / "doc.json"
+    writer_a = DocumentManager(path, journal=True)
+    writer_b = DocumentManager(path, journal=True)
+    writer_a.create_header("doc")
+
+    writer_a.add_prompt_response("s1", _section("one"))
+    writer_b.add_prompt_response("s2", _section("two"))
+    writer_a.add_prompt_response("s3", _section("three"))
+    assert writer_a.compact()
+
+    reader = DocumentManager(path, journal=True)
+    assert reader.load_from_file()
+    assert sorted(reader.documents) == ["s1", "s2", "s3"]
+    assert reader.documents["s2"].response == "two"
+    assert not writer_a.journal_path.exists()
+
+
+def test_append_after_torn_record_survives_replay(tmp_path):
+    path = tmp_path / "doc.json"
+    writer = DocumentManager(path, journal=True)
+    writer.create_header("doc")
+    writer.add_prompt_response("s1", _section("one"))
+    with writer.journal_path.open("ab") as f:
+        f.write(b'{"op":"section","name":"torn","payl')
+
+    recovered = DocumentManager(path, journal=True)
+    assert recovered.load_from_file()
+    recovered.add_prompt_response("s2", _section("two"))
+
+    reader = DocumentManager(path, journal=True)
+    assert reader.load_from_file()
+    assert sorted(reader.documents) == ["s1", "s2"]
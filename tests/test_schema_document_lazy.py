@@ -0,0 +1,43 @@
+# test_schema_document_lazy.py
+
+from WrapAI import DocumentManager, PromptResponse
+
+
+def _save(path, names):
+    writer = DocumentManager(path)
+    writer.create_header("doc")
+    for name in names:
+        writer.add_prompt_response(name, PromptResponse(model="m", user_prompt=f"prompt {name}", response=name))
+    writer._write_document()
+
+
+def _mmap(manager):
+    return manager.documents._scanner.buffer
+
+
+def test_lazy_load_without_sections_releases_the_mmap(tmp_path):
+    path = tmp_path / "doc.json"
+    _save(path, [])
+
+    reader = DocumentManager(path)
+    assert reader.load_from_file(lazy=True)
+    assert _mmap(reader).closed
+
+
+def test_reload_releases_the_mmap_of_a_partly_read_document(tmp_path):
+    path = tmp_path / "doc.json"
+    _save(path, ["s1", "s2"])
+
+    reader = DocumentManager(path)
+    assert reader.load_from_file(lazy=True)
+    assert reader.get_prompt_response("s1").response == "s1"
+    first = _mmap(reader)
+    assert not first.closed
+
+    assert reader.load_from_file(lazy=True)
+    assert first.closed
+    assert reader.get_prompt_response("s2").response == "s2"
+
+    second = _mmap(reader)
+    assert reader.load_from_file()
+    assert second.closed
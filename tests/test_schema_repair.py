@@ -0,0 +1,36 @@
+# test_schema_repair.py
+
+from WrapAI import PromptResponse
+from WrapAI.prompt_attributes import OpenAIPromptAttributes
+from WrapAI.schema_repair import StructuredOutputRepairer
+
+
+class FakeClient:
+    """Replies with a fixed continuation, parsed (and stripped) the way the text prompts do."""
+
+    def __init__(self, content: str):
+        self.attributes = OpenAIPromptAttributes()
+        self.content = content
+        self.messages = []
+        self.last_response_json = None
+
+    def prompt(self, user_prompt, system_prompt="", messages=None):
+        self.messages.append(messages)
+        self.last_response_json = {"choices": [{"message": {"content": self.content}}]}
+        return PromptResponse(model="m", response=self.content.strip())
+
+
+def test_continuation_keeps_whitespace_at_the_split_point():
+    client = FakeClient(' world"}')
+    repairer = StructuredOutputRepairer(client)
+
+    result = repairer.parse(PromptResponse(model="m", user_prompt="u", response='{"a": "hello'))
+    assert result == {"a": "hello world"}
+    assert repairer.stats.continued == 1
+
+
+def test_follow_up_without_system_prompt_sends_no_system_message():
+    client = FakeClient(' world"}')
+    StructuredOutputRepairer(client).parse(PromptResponse(model="m", user_prompt="u", response='{"a": "hello'))
+
+    assert [message["role"] for message in client.messages[0]] == ["user", "assistant", "user"]
@@ -0,0 +1,14 @@
+# test_schema_validator.py
+
+import pytest
+
+from WrapAI import SchemaBuilder, parse_response_with_schema, reconcile_schema_fields
+
+
+def test_schema_changed_in_place_is_compiled_again():
+    schema = SchemaBuilder("doc").add_string_property("a", required=True).build()
+    assert parse_response_with_schema({"a": "x"}, schema) == {"a": "x"}
+
+    assert reconcile_schema_fields(["a", "b"], schema) is schema
+    with pytest.raises(ValueError, match="Missing required field: b"):
+        parse_response_with_schema({"a": "x"}, schema)